@@ -15,5 +15,7 @@ class CustomUserAdmin(UserAdmin):
 @admin.register(TutorProfile)
 class TutorProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'volunteer_hours_completed', 'experience_years', 'is_verified', 'rating')
+    # Maintained from the volunteer hours ledger; add a ledger entry to correct it
+    readonly_fields = ('volunteer_hours_completed',)
     list_filter = ('is_verified', 'experience_years', 'commitment_level')
     search_fields = ('user__username', 'user__first_name', 'user__last_name')
\ No newline at end of file
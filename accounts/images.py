@@ -0,0 +1,194 @@
+"""
+Profile picture renditions.
+
+An upload is stored as the original only after being re-encoded without
+its metadata (see strip_metadata), so EXIF such as GPS positions and
+camera serials is never published, and square crops of it are written in
+each size of RENDITIONS as WebP and JPEG. Renditions are built after the
+upload's transaction commits, on a background thread by default, and
+recorded on ``User.profile_picture_renditions``:
+
+    {"source": "profiles/me.jpg", "card": {"webp": "...", "jpeg": "..."}, ...}
+
+Templates use ``{% profile_picture %}`` from the ``avatars`` tag library,
+which falls back to the original until renditions exist.
+"""
+import logging
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Edge length in pixels; about twice the largest size each is displayed at
+RENDITIONS = {
+    'avatar': 120,
+    'card': 240,
+    'full': 480,
+}
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+
+
+def validate_profile_picture(upload):
+    """Reject uploads that are too large in bytes or pixels, or not a plain image"""
+    if upload.size > settings.PROFILE_PICTURE_MAX_BYTES:
+        limit = settings.PROFILE_PICTURE_MAX_BYTES // (1024 * 1024)
+        raise ValidationError(f'Profile pictures must be {limit} MB or smaller.')
+
+    upload.seek(0)
+    try:
+        with Image.open(upload) as image:
+            image_format = image.format
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Upload a valid JPEG, PNG, WebP or GIF image.')
+    finally:
+        upload.seek(0)
+
+    if image_format not in ACCEPTED_FORMATS:
+        raise ValidationError('Upload a valid JPEG, PNG, WebP or GIF image.')
+    if width * height > settings.PROFILE_PICTURE_MAX_PIXELS:
+        limit = settings.PROFILE_PICTURE_MAX_PIXELS // 1_000_000
+        raise ValidationError(f'This image is too large; use one under {limit} megapixels.')
+
+
+def _metadata_free(image):
+    """A copy of ``image`` turned upright, with nothing but its pixels and colour profile"""
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image).copy()
+    image.info = {'icc_profile': icc_profile} if icc_profile else {}
+    return image
+
+
+def has_metadata(source):
+    with Image.open(source) as image:
+        return bool(image.getexif()) or any(key in image.info for key in ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment'))
+
+
+def strip_metadata(source):
+    """
+    Re-encode an image file in its own format without EXIF, XMP or comments,
+    and return it as a ContentFile. Animated images keep their first frame.
+    """
+    source.seek(0)
+    with Image.open(source) as image:
+        image_format = image.format
+        image = _metadata_free(image)
+    options = {'format': image_format}
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    if image_format == 'JPEG':
+        if image.mode not in ('RGB', 'L', 'CMYK'):
+            image = image.convert('RGB')
+        options.update(quality=90, optimize=True)
+    elif image_format == 'WEBP':
+        options.update(quality=90)
+    buffer = BytesIO()
+    image.save(buffer, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def rendition_name(user_id, source_name, size_name, extension):
+    # The media storage adds a content hash, so each upload gets new URLs
+    stem = source_name.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+    return f'profiles/renditions/{user_id}/{stem}-{size_name}.{extension}'
+
+
+def render(source):
+    """Encoded renditions of an open image file: {size_name: {extension: bytes}}"""
+    with Image.open(source) as image:
+        image = _metadata_free(image)
+        # Flatten transparency onto white so JPEG and WebP look the same
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+
+        encoded = {}
+        for size_name, edge in RENDITIONS.items():
+            square = ImageOps.fit(image, (edge, edge), Image.Resampling.LANCZOS)
+            encoded[size_name] = {}
+            for extension, options in FORMATS.items():
+                buffer = BytesIO()
+                square.save(buffer, **options)
+                encoded[size_name][extension] = buffer.getvalue()
+        return encoded
+
+
+def build_renditions(user):
+    """
+    Write renditions for the user's current picture and record them.
+
+    Returns False when the picture changed while this ran; the newer upload
+    has its own job.
+    """
+    source_name = user.profile_picture.name
+    with user.profile_picture.open('rb') as source:
+        data = source.read()
+
+    renditions = {'source': source_name}
+    for size_name, encoded in render(BytesIO(data)).items():
+        renditions[size_name] = {}
+        for extension, content in encoded.items():
+            name = rendition_name(user.pk, source_name, size_name, extension)
+            renditions[size_name][extension] = default_storage.save(name, ContentFile(content))
+
+    from .models import User
+    with transaction.atomic():
+        current = User.objects.select_for_update().filter(pk=user.pk).first()
+        if current is None or current.profile_picture.name != source_name:
+            return False
+        previous = current.profile_picture_renditions
+        current.profile_picture_renditions = renditions
+        current.save(update_fields=['profile_picture_renditions', 'updated_at'])
+
+    delete_renditions(previous, keep=renditions)
+    return True
+
+
+def delete_renditions(renditions, keep=None):
+    """Remove rendition files that are no longer referenced"""
+    kept = {name for size_name in RENDITIONS for name in (keep or {}).get(size_name, {}).values()}
+    for size_name in RENDITIONS:
+        for name in (renditions or {}).get(size_name, {}).values():
+            if name not in kept:
+                default_storage.delete(name)
+
+
+def _build_for_user_id(user_id):
+    from .models import User
+    try:
+        user = User.objects.filter(pk=user_id).first()
+        if user and user.profile_picture:
+            build_renditions(user)
+    except Exception:
+        logger.exception('Could not build profile picture renditions for user %s', user_id)
+    finally:
+        if settings.PROFILE_PICTURE_PROCESSING == 'thread':
+            # Threads get their own connection; don't leave it open
+            connection.close()
+
+
+def schedule_renditions(user):
+    """Build renditions once the current transaction commits"""
+    user_id = user.pk
+
+    def start():
+        if settings.PROFILE_PICTURE_PROCESSING == 'thread':
+            threading.Thread(target=_build_for_user_id, args=(user_id,), daemon=True).start()
+        else:
+            _build_for_user_id(user_id)
+    transaction.on_commit(start)
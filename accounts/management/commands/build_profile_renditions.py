@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from accounts.images import build_renditions, has_metadata, strip_metadata
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Strip metadata from stored profile pictures and build thumbnails for users that are missing them'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild renditions that already exist')
+    
+    def strip(self, user):
+        """Re-encode a picture uploaded before metadata was stripped on save"""
+        old_name = user.profile_picture.name
+        with user.profile_picture.open('rb') as source:
+            if not has_metadata(source):
+                return False
+            user.profile_picture.save(old_name.rsplit('/', 1)[-1], strip_metadata(source), save=False)
+        # update() so the save signal doesn't schedule a second rendition build
+        User.objects.filter(pk=user.pk).update(profile_picture=user.profile_picture.name, updated_at=timezone.now())
+        # Identical uploads share one stored file, which stays while another user still has it
+        if not User.objects.filter(profile_picture=old_name).exists():
+            user.profile_picture.storage.delete(old_name)
+        return True
+    
+    def handle(self, *args, **options):
+        built = failed = stripped = 0
+        for user in User.objects.exclude(profile_picture='').iterator():
+            try:
+                if self.strip(user):
+                    stripped += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'User {user.pk} ({user.profile_picture.name}): {e}')
+                continue
+            if not options['force'] and user.profile_picture_renditions.get('source') == user.profile_picture.name:
+                continue
+            try:
+                if build_renditions(user):
+                    built += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'User {user.pk} ({user.profile_picture.name}): {e}')
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Stripped metadata from {stripped} pictures and built renditions for {built} users ({failed} failed)')
+        )
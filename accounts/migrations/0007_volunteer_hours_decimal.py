@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_tutorprofile_approval_date_tutorprofile_is_approved_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tutorprofile',
+            name='volunteer_hours_completed',
+            field=models.DecimalField(decimal_places=1, default=0, help_text='Total volunteer hours completed', max_digits=7),
+        ),
+    ]
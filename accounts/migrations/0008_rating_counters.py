@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:09
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def fill_rating_counters(apps, schema_editor):
+    TutorProfile = apps.get_model('accounts', 'TutorProfile')
+    Review = apps.get_model('tutoring', 'Review')
+    
+    rows = Review.objects.values('reviewed').annotate(
+        total=models.Count('id'),
+        rating_total=models.Sum('rating'),
+        **{f'stars_{stars}': models.Count('id', filter=models.Q(rating=stars)) for stars in range(1, 6)}
+    ).order_by()
+    for row in rows:
+        TutorProfile.objects.filter(user_id=row['reviewed']).update(
+            total_reviews=row['total'],
+            rating_sum=row['rating_total'],
+            rating=round(Decimal(row['rating_total']) / row['total'], 2),
+            **{f'rating_{stars}': row[f'stars_{stars}'] for stars in range(1, 6)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_volunteer_hours_decimal'),
+        ('tutoring', '0005_volunteer_hours_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_rating_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:11
+
+from django.db import migrations, models
+
+
+def fill_last_active(apps, schema_editor):
+    TutorProfile = apps.get_model('accounts', 'TutorProfile')
+    TutoringSession = apps.get_model('tutoring', 'TutoringSession')
+    
+    latest = TutoringSession.objects.filter(status='completed').values('tutor').annotate(
+        last=models.Max('end_time')
+    ).order_by()
+    for row in latest:
+        TutorProfile.objects.filter(user_id=row['tutor']).update(last_active_at=row['last'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_rating_counters'),
+        ('tutoring', '0005_volunteer_hours_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='last_active_at',
+            field=models.DateTimeField(blank=True, help_text='When the tutor last completed a session', null=True),
+        ),
+        migrations.AddField(
+            model_name='tutorprofile',
+            name='rank_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tutorprofile',
+            index=models.Index(condition=models.Q(('is_verified', True)), fields=['-rank_score', '-id'], name='tutor_rank_idx'),
+        ),
+        migrations.RunPython(fill_last_active, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 class User(AbstractUser):
     USER_TYPE_CHOICES = [
@@ -10,8 +13,12 @@ class User(AbstractUser):
     phone = models.CharField(max_length=15, blank=True)
     bio = models.TextField(max_length=1000, blank=True)  # Increased from 500
     profile_picture = models.ImageField(upload_to='profiles/', blank=True)
+    # Resized copies of profile_picture, written by accounts.images
+    profile_picture_renditions = models.JSONField(default=dict, blank=True, editable=False)
     birthday = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Not moved by logins (save(update_fields=['last_login'])); used for conditional GETs
+    updated_at = models.DateTimeField(auto_now=True)
     
     # Enhanced profile fields
     location = models.CharField(max_length=100, blank=True, help_text="City, Province")
@@ -66,10 +73,23 @@ class TutorProfile(models.Model):
     is_verified = models.BooleanField(default=False)
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     total_reviews = models.IntegerField(default=0)
+    # Running totals kept by Review.save; manage.py reconcile_ratings repairs drift
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    # Ordering key for search and featured tutors, maintained by tutoring.ranking
+    rank_score = models.FloatField(default=0)
+    last_active_at = models.DateTimeField(null=True, blank=True, help_text="When the tutor last completed a session")
     
     # Volunteer tracking fields (replacing payment fields)
-    volunteer_hours_completed = models.PositiveIntegerField(
-        default=0, 
+    # Running total of the VolunteerHoursEntry ledger, updated with F() in the same transaction
+    volunteer_hours_completed = models.DecimalField(
+        max_digits=7,
+        decimal_places=1,
+        default=0,
         help_text="Total volunteer hours completed"
     )
     volunteer_hours_goal = models.PositiveIntegerField(
@@ -116,15 +136,38 @@ class TutorProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Serves filter(is_verified=True).order_by('-rank_score', '-id') without a sort
+            models.Index(fields=['-rank_score', '-id'], condition=models.Q(is_verified=True), name='tutor_rank_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.user.get_full_name()} - Volunteer Tutor"
     
+    def get_hours_this_month(self):
+        """Hours logged this month, read from the tutor's monthly rollup row"""
+        if not hasattr(self, '_hours_this_month'):
+            month = timezone.localdate().replace(day=1)
+            hours = self.monthly_hours.filter(month=month).values_list('hours', flat=True).first()
+            self._hours_this_month = hours or Decimal('0')
+        return self._hours_this_month
+    
     def get_completion_rate(self):
         """Calculate percentage of monthly goal completed"""
         if self.volunteer_hours_goal > 0:
-            return min(100, (self.volunteer_hours_completed / self.volunteer_hours_goal) * 100)
+            return min(100, (self.get_hours_this_month() / self.volunteer_hours_goal) * 100)
         return 0
     
+    def get_rating_histogram(self):
+        """(stars, count, percent) from 5 stars down, read from the stored counters"""
+        histogram = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f'rating_{stars}')
+            percent = round(count * 100 / self.total_reviews) if self.total_reviews else 0
+            histogram.append((stars, count, percent))
+        return histogram
+    
     def get_volunteer_level(self):
         """Get volunteer level based on hours completed"""
         hours = self.volunteer_hours_completed
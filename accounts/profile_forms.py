@@ -1,4 +1,6 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from .images import validate_profile_picture
 from .models import User, TutorProfile
 
 class ProfileEditForm(forms.ModelForm):
@@ -24,6 +26,13 @@ class ProfileEditForm(forms.ModelForm):
             'social_instagram': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'your_username'}),
             'is_profile_public': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
+    
+    def clean_profile_picture(self):
+        picture = self.cleaned_data.get('profile_picture')
+        # Only new uploads are checked; the stored picture passed already
+        if isinstance(picture, UploadedFile):
+            validate_profile_picture(picture)
+        return picture
 
 class TutorProfileEditForm(forms.ModelForm):
     subjects = forms.ModelMultipleChoiceField(
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .images import delete_renditions, schedule_renditions, strip_metadata
+from .models import User
+
+
+@receiver(pre_save, sender=User)
+def strip_profile_picture_metadata(sender, instance, **kwargs):
+    """Store new uploads re-encoded without EXIF; the original is public until renditions exist"""
+    picture = instance.profile_picture
+    # Uncommitted means a new upload that the field has not written to storage yet
+    if kwargs.get('raw') or not picture or picture._committed:
+        return
+    picture.save(picture.name, strip_metadata(picture), save=False)
+
+
+@receiver(post_save, sender=User)
+def process_profile_picture(sender, instance, **kwargs):
+    """Build renditions for a new picture, or drop them when it is removed"""
+    if kwargs.get('raw'):
+        return
+    renditions = instance.profile_picture_renditions
+    if instance.profile_picture:
+        if renditions.get('source') != instance.profile_picture.name:
+            schedule_renditions(instance)
+    elif renditions:
+        User.objects.filter(pk=instance.pk).update(profile_picture_renditions={})
+        instance.profile_picture_renditions = {}
+        transaction.on_commit(lambda: delete_renditions(renditions))
@@ -0,0 +1,29 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def profile_picture(user, size='card', **attrs):
+    """
+    A <picture> with the WebP and JPEG renditions of ``user``'s profile picture.
+
+    Extra keyword arguments become attributes of the <img>, e.g.
+    ``{% profile_picture tutor.user 'card' class="rounded-circle" width=80 height=80 %}``.
+    Until the renditions are built this shows the original upload, which
+    was stored without its metadata.
+    """
+    attrs.setdefault('alt', user.get_full_name() or user.username)
+    attrs.setdefault('loading', 'lazy')
+    img_attrs = format_html_join('', ' {}="{}"', attrs.items())
+    rendition = user.profile_picture_renditions.get(size)
+    if not rendition:
+        return format_html('<img src="{}"{}>', user.profile_picture.url, img_attrs)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}"><img src="{}"{}></picture>',
+        default_storage.url(rendition['webp']),
+        default_storage.url(rendition['jpeg']),
+        img_attrs
+    )
@@ -1,3 +1,62 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .models import User
+
+GPS_IFD = 0x8825
+ORIENTATION = 0x0112
+
+
+def jpeg_with_exif():
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6  # stored sideways, shown rotated
+    exif[0x010F] = 'Camera maker'
+    exif[GPS_IFD] = {2: (51.0, 30.0, 0.0)}
+    buffer = BytesIO()
+    Image.new('RGB', (300, 200), 'red').save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class ProfilePictureMetadataTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_stored_original_has_no_exif(self):
+        user = User.objects.create_user('pictured', password='x', user_type='student')
+        user.profile_picture = SimpleUploadedFile('me.jpg', jpeg_with_exif(), content_type='image/jpeg')
+        user.save()
+
+        with user.profile_picture.open('rb') as stored, Image.open(stored) as image:
+            self.assertEqual(dict(image.getexif()), {})
+            self.assertNotIn('exif', image.info)
+            # The orientation was applied to the pixels before it was dropped
+            self.assertEqual(image.size, (200, 300))
+
+    def test_stripping_a_shared_legacy_original_keeps_it_for_others(self):
+        # Stored before uploads were stripped; identical uploads share one name
+        legacy = default_storage.save('profiles/me.jpg', ContentFile(jpeg_with_exif()))
+        users = [User.objects.create_user(f'user{i}', password='x', user_type='student') for i in range(2)]
+        User.objects.update(profile_picture=legacy)
+
+        call_command('build_profile_renditions', stdout=StringIO(), stderr=StringIO())
+
+        names = set(User.objects.values_list('profile_picture', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertNotIn(legacy, names)
+        self.assertFalse(default_storage.exists(legacy))
+        for user in users:
+            user.refresh_from_db()
+            with user.profile_picture.open('rb') as stored, Image.open(stored) as image:
+                self.assertEqual(dict(image.getexif()), {})
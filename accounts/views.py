@@ -3,9 +3,11 @@ from django.contrib.auth import login, authenticate, logout, get_user_model
 from django.contrib import messages
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required
+from django.utils import timezone
 from .forms import CustomUserCreationForm, CustomAuthenticationForm
 from .profile_forms import ProfileEditForm, TutorProfileEditForm
 from .models import TutorProfile
+from tutoring_platform.conditional import conditional_page
 
 def signup_view(request):
     if request.method == 'POST':
@@ -35,7 +37,19 @@ def logout_view(request):
     messages.success(request, 'You have been successfully logged out.')
     return redirect('home')
 
+def profile_page_state(request, user_id=None):
+    user_id = user_id or request.user.id
+    row = get_user_model().objects.filter(id=user_id).values(
+        'updated_at', 'is_profile_public', 'tutorprofile__updated_at'
+    ).first()
+    if row is None or (user_id != request.user.id and not row['is_profile_public']):
+        return None
+    # Age and this month's hours change with the date
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return [row['updated_at'], row['tutorprofile__updated_at'], today]
+
 @login_required
+@conditional_page(profile_page_state)
 def profile_view(request, user_id=None):
     if user_id:
         User = get_user_model()
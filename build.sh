@@ -3,6 +3,12 @@ set -o errexit
 
 pip install -r requirements.txt
 
+# Cache invalidation must reach every worker: leave CACHE_BACKEND unset (file)
+# or set it to redis; never locmem with more than one worker (see README.md)
+
 python manage.py collectstatic --no-input
 python manage.py migrate
+python manage.py recompute_rank_scores
+python manage.py rebuild_weekly_loads
+python manage.py build_profile_renditions
 python create_superuser.py
\ No newline at end of file
@@ -1,10 +1,16 @@
 from django.contrib import admin
-from .models import Conversation, Message
+from .models import Conversation, ConversationMember, Message
+
+class ConversationMemberInline(admin.TabularInline):
+    model = ConversationMember
+    extra = 0
+    raw_id_fields = ('user',)
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
     list_display = ('id', 'get_participants', 'created_at', 'updated_at')
     list_filter = ('created_at', 'updated_at')
+    inlines = [ConversationMemberInline]
     
     def get_participants(self, obj):
         return ", ".join([user.username for user in obj.participants.all()])
@@ -12,8 +18,8 @@ class ConversationAdmin(admin.ModelAdmin):
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ('sender', 'conversation', 'content_preview', 'created_at', 'is_read')
-    list_filter = ('created_at', 'is_read')
+    list_display = ('sender', 'conversation', 'content_preview', 'created_at')
+    list_filter = ('created_at',)
     search_fields = ('content', 'sender__username')
     
     def content_preview(self, obj):
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from messaging.models import ArchivedMessage, Message
+
+class Command(BaseCommand):
+    help = 'Move messages older than --days into the archive table'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365,
+                            help='Archive messages sent more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Messages moved per transaction')
+    
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+        
+        # Archive by id so every archived message stays below every live one,
+        # which the thread and search windows rely on
+        last_id = Message.objects.filter(created_at__lt=cutoff).aggregate(last=Max('id'))['last']
+        count = 0
+        while last_id is not None:
+            with transaction.atomic():
+                batch = list(
+                    Message.objects.filter(id__lte=last_id).order_by('id').values(
+                        'id', 'sender_id', 'conversation_id', 'content', 'created_at'
+                    )[:batch_size]
+                )
+                if not batch:
+                    break
+                ArchivedMessage.objects.bulk_create(
+                    [ArchivedMessage(**row) for row in batch],
+                    ignore_conflicts=True
+                )
+                Message.objects.filter(id__in=[row['id'] for row in batch]).delete()
+            count += len(batch)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {count} messages older than {options["days"]} days')
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+from messaging.models import Conversation, Message
+
+class Command(BaseCommand):
+    help = 'Copy each conversation\'s newest message onto its last-message fields'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Conversations updated per statement')
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        latest = Message.objects.filter(
+            conversation=OuterRef('pk')
+        ).order_by('-id')
+        
+        count = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Conversation.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # One set-based UPDATE per batch instead of a save per conversation
+            count += Conversation.objects.filter(id__in=ids).update(
+                last_message_id=Subquery(latest.values('id')[:1]),
+                last_message_preview=Coalesce(Subquery(latest.annotate(preview=Substr('content', 1, 200)).values('preview')[:1]), Value('')),
+                last_sender_id=Subquery(latest.values('sender_id')[:1]),
+                last_message_at=Coalesce(Subquery(latest.values('created_at')[:1]), F('created_at')),
+            )
+            last_id = ids[-1]
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfilled last messages for {count} conversations')
+        )
@@ -0,0 +1,113 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_participants(apps, schema_editor):
+    """
+    Turn each participant row into a membership with a read watermark.
+
+    The watermark sits just below the oldest message from someone else that
+    was still unread, or at the newest message if everything had been read.
+    """
+    Conversation = apps.get_model('messaging', 'Conversation')
+    ConversationMember = apps.get_model('messaging', 'ConversationMember')
+    Message = apps.get_model('messaging', 'Message')
+    Participant = Conversation.participants.through
+
+    memberships = []
+    for participant in Participant.objects.all().iterator():
+        messages = Message.objects.filter(conversation_id=participant.conversation_id)
+        first_unread = messages.filter(is_read=False).exclude(
+            sender_id=participant.user_id
+        ).aggregate(first=models.Min('id'))['first']
+        if first_unread is not None:
+            watermark = first_unread - 1
+        else:
+            watermark = messages.aggregate(last=models.Max('id'))['last'] or 0
+        memberships.append(ConversationMember(
+            conversation_id=participant.conversation_id,
+            user_id=participant.user_id,
+            last_read_message_id=watermark,
+        ))
+    ConversationMember.objects.bulk_create(memberships, batch_size=500)
+
+
+def copy_members_back(apps, schema_editor):
+    """Refill the participants table and mark messages up to each watermark as read"""
+    Conversation = apps.get_model('messaging', 'Conversation')
+    ConversationMember = apps.get_model('messaging', 'ConversationMember')
+    Message = apps.get_model('messaging', 'Message')
+    Participant = Conversation.participants.through
+
+    participants = []
+    for member in ConversationMember.objects.all().iterator():
+        participants.append(Participant(conversation_id=member.conversation_id, user_id=member.user_id))
+        Message.objects.filter(
+            conversation_id=member.conversation_id,
+            id__lte=member.last_read_message_id
+        ).exclude(sender_id=member.user_id).update(is_read=True)
+    Participant.objects.bulk_create(participants, batch_size=500)
+
+
+def _participants_table(apps):
+    Conversation = apps.get_model('messaging', 'Conversation')
+    return Conversation._meta.get_field('participants').remote_field.through
+
+
+def drop_participants_table(apps, schema_editor):
+    schema_editor.delete_model(_participants_table(apps))
+
+
+def create_participants_table(apps, schema_editor):
+    schema_editor.create_model(_participants_table(apps))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.BigIntegerField(default=0)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='messaging.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('conversation', 'user'), name='unique_conversation_member')],
+            },
+        ),
+        migrations.RunPython(copy_participants, copy_members_back),
+        # The old auto-created participants table is replaced by the membership table
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='conversation',
+                    name='participants',
+                ),
+                migrations.AddField(
+                    model_name='conversation',
+                    name='participants',
+                    field=models.ManyToManyField(related_name='conversations', through='messaging.ConversationMember', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(drop_participants_table, create_participants_table),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'id'], name='message_conversation_id_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+def assign_direct_keys(apps, schema_editor):
+    """Key two-person conversations; only the oldest one for each pair gets the key"""
+    ConversationMember = apps.get_model('messaging', 'ConversationMember')
+    Conversation = apps.get_model('messaging', 'Conversation')
+
+    members = {}
+    for conversation_id, user_id in ConversationMember.objects.values_list('conversation_id', 'user_id'):
+        members.setdefault(conversation_id, []).append(user_id)
+
+    seen = set()
+    for conversation_id in sorted(members):
+        user_ids = members[conversation_id]
+        if len(user_ids) != 2:
+            continue
+        low, high = sorted(user_ids)
+        key = f"{low}:{high}"
+        if key in seen:
+            continue
+        seen.add(key)
+        Conversation.objects.filter(id=conversation_id).update(direct_key=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_conversationmember'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='direct_key',
+            field=models.CharField(blank=True, editable=False, max_length=50, null=True, unique=True),
+        ),
+        migrations.RunPython(assign_direct_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+
+def fill_last_messages(apps, schema_editor):
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Message = apps.get_model('messaging', 'Message')
+    
+    latest = Message.objects.filter(conversation=OuterRef('pk')).order_by('-id')
+    Conversation.objects.update(
+        last_message_id=Subquery(latest.values('id')[:1]),
+        last_message_preview=Coalesce(
+            Subquery(latest.annotate(preview=Substr('content', 1, 200)).values('preview')[:1]), Value('')
+        ),
+        last_sender_id=Subquery(latest.values('sender_id')[:1]),
+        last_message_at=Coalesce(Subquery(latest.values('created_at')[:1]), F('created_at')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_message_conversation_time_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['last_message_at', 'id'], name='conversation_last_message_idx'),
+        ),
+        migrations.RunPython(fill_last_messages, migrations.RunPython.noop),
+    ]
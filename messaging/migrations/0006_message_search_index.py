@@ -0,0 +1,83 @@
+from django.db import migrations
+
+
+SQLITE_FORWARDS = [
+    """
+    CREATE VIRTUAL TABLE messaging_message_fts USING fts5(
+        content,
+        content='messaging_message',
+        content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER messaging_message_fts_ai AFTER INSERT ON messaging_message BEGIN
+        INSERT INTO messaging_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messaging_message_fts_ad AFTER DELETE ON messaging_message BEGIN
+        INSERT INTO messaging_message_fts(messaging_message_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messaging_message_fts_au AFTER UPDATE OF content ON messaging_message BEGIN
+        INSERT INTO messaging_message_fts(messaging_message_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO messaging_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    # Index the messages that already exist
+    "INSERT INTO messaging_message_fts(messaging_message_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS messaging_message_fts_au",
+    "DROP TRIGGER IF EXISTS messaging_message_fts_ad",
+    "DROP TRIGGER IF EXISTS messaging_message_fts_ai",
+    "DROP TABLE IF EXISTS messaging_message_fts",
+]
+
+POSTGRES_FORWARDS = [
+    """
+    ALTER TABLE messaging_message ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(content, ''))
+    ) STORED
+    """,
+    "CREATE INDEX messaging_message_search_gin ON messaging_message USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS messaging_message_search_gin",
+    "ALTER TABLE messaging_message DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_FORWARDS,
+        'postgresql': POSTGRES_FORWARDS,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_BACKWARDS,
+        'postgresql': POSTGRES_BACKWARDS,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0005_conversation_last_message'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
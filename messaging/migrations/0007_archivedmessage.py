@@ -0,0 +1,100 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+SQLITE_FORWARDS = [
+    """
+    CREATE VIRTUAL TABLE messaging_archivedmessage_fts USING fts5(
+        content,
+        content='messaging_archivedmessage',
+        content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER messaging_archivedmessage_fts_ai AFTER INSERT ON messaging_archivedmessage BEGIN
+        INSERT INTO messaging_archivedmessage_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messaging_archivedmessage_fts_ad AFTER DELETE ON messaging_archivedmessage BEGIN
+        INSERT INTO messaging_archivedmessage_fts(messaging_archivedmessage_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER messaging_archivedmessage_fts_au AFTER UPDATE OF content ON messaging_archivedmessage BEGIN
+        INSERT INTO messaging_archivedmessage_fts(messaging_archivedmessage_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO messaging_archivedmessage_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS messaging_archivedmessage_fts_au",
+    "DROP TRIGGER IF EXISTS messaging_archivedmessage_fts_ad",
+    "DROP TRIGGER IF EXISTS messaging_archivedmessage_fts_ai",
+    "DROP TABLE IF EXISTS messaging_archivedmessage_fts",
+]
+
+POSTGRES_FORWARDS = [
+    """
+    ALTER TABLE messaging_archivedmessage ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(content, ''))
+    ) STORED
+    """,
+    "CREATE INDEX messaging_archivedmessage_search_gin ON messaging_archivedmessage USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS messaging_archivedmessage_search_gin",
+    "ALTER TABLE messaging_archivedmessage DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_FORWARDS,
+        'postgresql': POSTGRES_FORWARDS,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_BACKWARDS,
+        'postgresql': POSTGRES_BACKWARDS,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0006_message_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='messaging.conversation')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['conversation', 'id'], name='archived_conversation_id_idx')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
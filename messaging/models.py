@@ -1,15 +1,28 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
 class Conversation(models.Model):
-    participants = models.ManyToManyField(User, related_name='conversations')
+    participants = models.ManyToManyField(User, through='ConversationMember', related_name='conversations')
+    # "<lower user id>:<higher user id>" for 1:1 conversations, empty for groups
+    direct_key = models.CharField(max_length=50, unique=True, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Copy of the newest message, maintained by Message.save, so the inbox needs no lookup
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=200, blank=True)
+    last_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(default=timezone.now)
+    
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['last_message_at', 'id'], name='conversation_last_message_idx'),
+        ]
     
     def __str__(self):
         participants = self.participants.all()
@@ -21,11 +34,51 @@ class Conversation(models.Model):
                 usernames += f" and {participants.count() - 3} others"
             return f"Group conversation: {usernames}"
     
+    @staticmethod
+    def direct_key_for(user_a, user_b):
+        low, high = sorted([user_a.pk, user_b.pk])
+        return f"{low}:{high}"
+    
+    @classmethod
+    def get_or_create_direct(cls, user_a, user_b):
+        """
+        Return the 1:1 conversation between two users, creating it at most once.
+        
+        The lookup is a probe of the unique direct_key index, and concurrent
+        creates collide on that index so only one conversation is ever made.
+        """
+        with transaction.atomic():
+            conversation, created = cls.objects.get_or_create(
+                direct_key=cls.direct_key_for(user_a, user_b)
+            )
+            # Also brings back anyone who deleted the conversation from their inbox
+            conversation.participants.add(user_a, user_b)
+        return conversation, created
+    
     def get_latest_message(self):
         return self.messages.first()
     
     def get_unread_count_for_user(self, user):
-        return self.messages.filter(is_read=False).exclude(sender=user).count()
+        membership = self.memberships.filter(user=user).first()
+        if membership is None:
+            return 0
+        return self.messages.filter(
+            id__gt=membership.last_read_message_id
+        ).exclude(sender=user).count()
+    
+    def mark_read(self, user, message_id):
+        """Move the user's read watermark up to message_id; a single-row UPDATE"""
+        return ConversationMember.objects.filter(
+            conversation=self,
+            user=user,
+            last_read_message_id__lt=message_id
+        ).update(last_read_message_id=message_id)
+    
+    def get_read_watermark(self, current_user):
+        """Highest message id every other participant has read"""
+        return self.memberships.exclude(user=current_user).aggregate(
+            watermark=models.Min('last_read_message_id')
+        )['watermark'] or 0
     
     def get_other_participant(self, current_user):
         """Get the other participant in a 2-person conversation"""
@@ -38,21 +91,76 @@ class Conversation(models.Model):
         """Get all other participants excluding the current user"""
         return self.participants.exclude(id=current_user.id)
 
+class ConversationMember(models.Model):
+    """A participant in a conversation and how far they have read"""
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    # Every message with an id up to this one has been read by the user
+    last_read_message_id = models.BigIntegerField(default=0)
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='unique_conversation_member'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} in conversation {self.conversation_id}"
+
 class Message(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread counts are range counts above a participant's watermark
+            models.Index(fields=['conversation', 'id'], name='message_conversation_id_idx'),
+            # Threads and delta syncs read a conversation's messages in time order
+            models.Index(fields=['conversation', 'created_at'], name='message_conversation_time_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.username} at {self.created_at.strftime('%Y-%m-%d %H:%M')}"
     
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Update conversation's updated_at field
-        self.conversation.updated_at = self.created_at
-        self.conversation.save(update_fields=['updated_at'])
\ No newline at end of file
+        is_new = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                # One conditional UPDATE; it never moves the pointer back to an older message
+                Conversation.objects.filter(
+                    Q(last_message_id__isnull=True) | Q(last_message_id__lt=self.id),
+                    pk=self.conversation_id
+                ).update(
+                    last_message_id=self.id,
+                    last_message_preview=self.content[:200],
+                    last_sender_id=self.sender_id,
+                    last_message_at=self.created_at,
+                    updated_at=self.created_at
+                )
+
+class ArchivedMessage(models.Model):
+    """
+    A message moved out of Message by the archive_messages command.
+
+    Keeps the original id, so archived messages always sort below live ones,
+    and has its own full-text index so old history stays searchable without
+    weighing on the live table and its indexes.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='archived_messages')
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', 'id'], name='archived_conversation_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived message from {self.sender.username} at {self.created_at.strftime('%Y-%m-%d %H:%M')}"
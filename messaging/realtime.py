@@ -0,0 +1,190 @@
+"""
+Push delivery of messaging events to open browser tabs.
+
+Views publish small JSON events addressed to users and the ``event_stream``
+view relays them as Server-Sent Events. Streaming needs the ASGI entry point
+(tutoring_platform.asgi) so an idle connection costs a coroutine rather than
+a worker thread.
+
+The broker is chosen with ``settings.MESSAGING_BROKER``. The default
+in-process broker only reaches clients connected to the same process; use
+``RedisBroker`` (with ``MESSAGING_BROKER_URL``) when running several nodes.
+"""
+import abc
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+
+
+def _offer(queue, event):
+    """Queue an event for a slow client, dropping it rather than blocking publishers"""
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        logger.warning('Dropping messaging event for a slow client')
+
+
+class BaseBroker(abc.ABC):
+    """Fan-out of per-user events; publish() is called from sync views"""
+
+    @abc.abstractmethod
+    def publish(self, user_id, event):
+        """Deliver ``event`` to every open stream of ``user_id``"""
+
+    @abc.abstractmethod
+    def subscribe(self, user_id):
+        """Async context manager yielding an asyncio.Queue of the user's events"""
+
+
+class InProcessBroker(BaseBroker):
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            # Publishers run in sync views on other threads than the stream's loop
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(subscriber)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+
+class RedisBroker(BaseBroker):
+    """Redis pub/sub, one channel per user, for deployments with several nodes"""
+
+    def __init__(self, url=None):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured('RedisBroker requires the "redis" package') from exc
+        self.url = url or getattr(settings, 'MESSAGING_BROKER_URL', None)
+        if not self.url:
+            raise ImproperlyConfigured('RedisBroker requires MESSAGING_BROKER_URL')
+        self._client = redis.Redis.from_url(self.url)
+        self._async_redis = redis.asyncio
+
+    @staticmethod
+    def channel(user_id):
+        return f'messaging:user:{user_id}'
+
+    def publish(self, user_id, event):
+        self._client.publish(self.channel(user_id), json.dumps(event))
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, user_id):
+        client = self._async_redis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(self.channel(user_id))
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+        async def relay():
+            async for item in pubsub.listen():
+                if item['type'] == 'message':
+                    _offer(queue, json.loads(item['data']))
+
+        task = asyncio.create_task(relay())
+        try:
+            yield queue
+        finally:
+            task.cancel()
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(settings, 'MESSAGING_BROKER', 'messaging.realtime.InProcessBroker')
+            _broker = import_string(path)()
+        return _broker
+
+
+def publish(user_ids, event_type, data):
+    """Send an event to each user once the current transaction commits"""
+    event = {'type': event_type, **data}
+
+    def send():
+        broker = get_broker()
+        for user_id in user_ids:
+            try:
+                broker.publish(user_id, event)
+            except Exception:
+                # Push is best effort; clients catch up on their next load
+                logger.exception('Could not publish messaging event')
+
+    transaction.on_commit(send)
+
+
+def message_payload(message):
+    return {
+        'conversation_id': message.conversation_id,
+        'id': message.id,
+        'sender_id': message.sender_id,
+        'sender_name': message.sender.get_full_name() or message.sender.username,
+        'content': message.content,
+        'created_at': message.created_at.isoformat(),
+    }
+
+
+def publish_new_message(message):
+    """Deliver a new message to every member, with the new unread count for recipients"""
+    conversation = message.conversation
+    memberships = list(conversation.memberships.values_list('user_id', 'last_read_message_id'))
+    publish([user_id for user_id, _ in memberships], 'message', message_payload(message))
+
+    for user_id, last_read_message_id in memberships:
+        if user_id == message.sender_id:
+            continue
+        unread_count = conversation.messages.filter(
+            id__gt=last_read_message_id
+        ).exclude(sender_id=user_id).count()
+        publish([user_id], 'unread', {
+            'conversation_id': conversation.id,
+            'unread_count': unread_count,
+        })
+
+
+def publish_read(conversation, user):
+    """Tell members how far everyone has read (for sent ticks) and the reader's unread count"""
+    for other_id in conversation.memberships.exclude(user=user).values_list('user_id', flat=True):
+        publish([other_id], 'read', {
+            'conversation_id': conversation.id,
+            'watermark': conversation.get_read_watermark(other_id),
+        })
+    publish([user.id], 'unread', {
+        'conversation_id': conversation.id,
+        'unread_count': conversation.get_unread_count_for_user(user),
+    })
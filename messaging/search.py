@@ -0,0 +1,90 @@
+from django.db.models import Q, TextField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Substr
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from tutoring_platform.fulltext import fts5_match, pg_tsquery, search_terms, vendor
+from .models import ArchivedMessage, ConversationMember, Message
+
+# Highlight markers placed by the database; the snippet is escaped before they become <mark> tags
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_WORDS = 16
+
+
+def search_messages(user, text, model=Message):
+    """
+    Messages matching ``text`` in conversations ``user`` belongs to.
+
+    Searches live messages, or the archive with ``model=ArchivedMessage``.
+    Each message is annotated with ``snippet``, a short excerpt with the
+    matched terms between MARK_START and MARK_END. Returns an empty queryset
+    when there is nothing to search for.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return model.objects.none()
+
+    messages = model.objects.filter(
+        conversation_id__in=ConversationMember.objects.filter(user=user).values('conversation_id')
+    )
+    backend = vendor()
+    table = model._meta.db_table
+    if backend == 'sqlite':
+        return _search_sqlite(messages, table, terms)
+    if backend == 'postgresql':
+        return _search_postgres(messages, table, terms)
+    return _search_fallback(messages, terms)
+
+
+def search_all_messages(user, text):
+    """Live then archived matches, for reading with newest_first()"""
+    return [search_messages(user, text), search_messages(user, text, model=ArchivedMessage)]
+
+
+def highlight(snippet):
+    """Escape a snippet and turn its markers into <mark> tags"""
+    html = escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def _search_sqlite(messages, table, terms):
+    match = fts5_match(terms)
+    return messages.filter(
+        id__in=RawSQL(
+            f'SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s',
+            [match]
+        )
+    ).annotate(
+        snippet=RawSQL(
+            f'SELECT snippet({table}_fts, 0, %s, %s, %s, %s) FROM {table}_fts '
+            f'WHERE {table}_fts MATCH %s AND rowid = {table}.id',
+            [MARK_START, MARK_END, '…', SNIPPET_WORDS, match],
+            output_field=TextField()
+        )
+    )
+
+
+def _search_postgres(messages, table, terms):
+    query = pg_tsquery(terms)
+    options = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=5'
+    return messages.filter(
+        id__in=RawSQL(
+            f"SELECT id FROM {table} WHERE search_vector @@ to_tsquery('english', %s)",
+            [query]
+        )
+    ).annotate(
+        snippet=RawSQL(
+            f"ts_headline('english', {table}.content, to_tsquery('english', %s), %s)",
+            [query, options],
+            output_field=TextField()
+        )
+    )
+
+
+def _search_fallback(messages, terms):
+    """Unindexed LIKE matching for databases without a full-text index"""
+    for term in terms:
+        messages = messages.filter(Q(content__icontains=term))
+    return messages.annotate(snippet=Substr('content', 1, 200))
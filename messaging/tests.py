@@ -1,3 +1,205 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import TutorProfile
+from .models import ArchivedMessage, Conversation, Message
+from .realtime import BaseBroker
+from .search import search_all_messages, search_messages
+from .views import THREAD_WINDOW
+
+User = get_user_model()
+
+
+class InboxQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='student', password='password', user_type='student'
+        )
+        self.client.force_login(self.user)
+    
+    def add_conversations(self, count):
+        for i in range(count):
+            other = User.objects.create_user(
+                username=f'tutor{Conversation.objects.count()}', user_type='tutor'
+            )
+            conversation = Conversation.objects.create()
+            conversation.participants.add(self.user, other)
+            Message.objects.create(conversation=conversation, sender=other, content=f'Hello {i}')
+            Message.objects.create(conversation=conversation, sender=self.user, content=f'Reply {i}')
+    
+    def count_inbox_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('messaging:inbox'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+    
+    def test_query_count_does_not_grow_with_conversations(self):
+        self.add_conversations(2)
+        small_inbox = self.count_inbox_queries()
+        
+        self.add_conversations(18)
+        large_inbox = self.count_inbox_queries()
+        
+        self.assertEqual(small_inbox, large_inbox)
+    
+    def test_inbox_shows_latest_message_and_unread_count(self):
+        other = User.objects.create_user(username='tutor', first_name='Tina', user_type='tutor')
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.user, other)
+        Message.objects.create(conversation=conversation, sender=other, content='First question')
+        Message.objects.create(conversation=conversation, sender=other, content='Second question')
+        
+        response = self.client.get(reverse('messaging:inbox'))
+        
+        self.assertContains(response, 'Second question')
+        self.assertNotContains(response, 'First question')
+        self.assertContains(response, '2 new')
+        self.assertContains(response, 'Chat with Tina')
+
+
+class ThreadWindowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='password', user_type='student')
+        tutor = User.objects.create_user(username='tutor', user_type='tutor')
+        # The thread page links to the tutor's booking page
+        TutorProfile.objects.get_or_create(user=tutor)
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, tutor)
+        Message.objects.bulk_create([
+            Message(conversation=self.conversation, sender=tutor, content=f'Message {i}')
+            for i in range(THREAD_WINDOW + 5)
+        ])
+        self.ids = list(Message.objects.order_by('id').values_list('id', flat=True))
+        self.client.force_login(self.user)
+    
+    def newest_window(self):
+        response = self.client.get(reverse('messaging:conversation_detail', args=[self.conversation.id]))
+        return response.context['thread_messages']
+    
+    def older(self, page):
+        return self.client.get(page.next_url, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+    
+    def test_loads_newest_window_then_older(self):
+        page = self.newest_window()
+        self.assertEqual([message.id for message in page], self.ids[5:])
+        
+        older = self.older(page)
+        self.assertIsNone(older['next_url'])
+        self.assertIn('Message 4', older['html'])
+        self.assertNotIn('Message 5<', older['html'])
+    
+    def test_archived_messages_continue_the_thread(self):
+        Message.objects.filter(id__in=self.ids[:10]).update(
+            created_at=timezone.now() - timedelta(days=400), content='Ancient chemistry'
+        )
+        call_command('archive_messages', stdout=StringIO())
+        self.assertEqual(ArchivedMessage.objects.count(), 10)
+        
+        page = self.newest_window()
+        self.assertEqual([message.id for message in page], self.ids[5:])
+        self.assertIn('Ancient chemistry', self.older(page)['html'])
+        
+        live, archived = search_all_messages(self.user, 'chemistry')
+        self.assertFalse(live.exists())
+        self.assertEqual(sorted(archived.values_list('id', flat=True)), self.ids[:10])
+
+
+class MessageSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='password', user_type='student')
+        self.tutor = User.objects.create_user(username='tutor', user_type='tutor')
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.tutor)
+        self.client.force_login(self.user)
+    
+    def add_message(self, content, conversation=None, sender=None):
+        return Message.objects.create(
+            conversation=conversation or self.conversation, sender=sender or self.tutor, content=content
+        )
+    
+    def test_only_searches_own_conversations(self):
+        mine = self.add_message('Bring your chemistry notes')
+        stranger = User.objects.create_user(username='stranger', user_type='tutor')
+        elsewhere = Conversation.objects.create()
+        elsewhere.participants.add(self.tutor, stranger)
+        self.add_message('Chemistry is tomorrow', conversation=elsewhere)
+        
+        self.assertEqual(list(search_messages(self.user, 'chem')), [mine])
+    
+    def test_index_follows_edits_and_deletes(self):
+        message = self.add_message('Bring your chemistry notes')
+        message.content = 'Bring your physics notes'
+        message.save()
+        self.assertEqual(list(search_messages(self.user, 'chemistry')), [])
+        self.assertEqual(list(search_messages(self.user, 'physics')), [message])
+        
+        message.delete()
+        self.assertEqual(list(search_messages(self.user, 'physics')), [])
+    
+    def test_results_highlight_escaped_snippets(self):
+        self.add_message('<b>Chemistry</b> help tonight')
+        
+        response = self.client.get(reverse('messaging:search'), {'q': 'chemistry'})
+        
+        self.assertContains(response, '&lt;b&gt;<mark>Chemistry</mark>&lt;/b&gt;')
+        self.assertNotContains(response, '<b>Chemistry</b>')
+
+
+class WsgiFallbackTests(TestCase):
+    """The test client is a WSGI client, like gunicorn's sync workers"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='password', user_type='student')
+        self.client.force_login(self.user)
+    
+    def test_event_stream_closes_at_once(self):
+        response = self.client.get(reverse('messaging:event_stream'))
+        self.assertEqual(response.status_code, 204)
+    
+    def test_updates_ignore_wait(self):
+        other = User.objects.create_user(username='tutor', user_type='tutor')
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.user, other)
+        
+        response = self.client.get(
+            reverse('messaging:conversation_updates', args=[conversation.id]), {'after': 0, 'wait': 30}
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['messages'], [])
+
+
+class RecordingBroker(BaseBroker):
+    def __init__(self):
+        self.events = []
+    
+    def publish(self, user_id, event):
+        self.events.append((user_id, event))
+    
+    def subscribe(self, user_id):
+        raise NotImplementedError
+
 
-# Create your tests here.
+class StartConversationTests(TestCase):
+    def test_first_message_is_pushed_to_recipient(self):
+        student = User.objects.create_user(username='student', password='password', user_type='student')
+        tutor = User.objects.create_user(username='tutor', user_type='tutor')
+        broker = RecordingBroker()
+        self.client.force_login(student)
+        
+        with mock.patch('messaging.realtime.get_broker', return_value=broker), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('messaging:start_conversation', args=[tutor.id]), {'message': 'Hi there'})
+        
+        message = Message.objects.get()
+        self.assertIn((tutor.id, {'type': 'unread', 'conversation_id': message.conversation_id, 'unread_count': 1}), broker.events)
+        self.assertIn(tutor.id, [user_id for user_id, event in broker.events if event['type'] == 'message'])
@@ -5,8 +5,13 @@ app_name = 'messaging'
 
 urlpatterns = [
     path('', views.inbox, name='inbox'),
+    path('search/', views.search, name='search'),
     path('conversation/<int:conversation_id>/', views.conversation_detail, name='conversation_detail'),
+    path('conversation/<int:conversation_id>/older/', views.older_messages, name='older_messages'),
     path('conversation/<int:conversation_id>/send/', views.send_message, name='send_message'),
+    path('conversation/<int:conversation_id>/read/', views.mark_read, name='mark_read'),
+    path('conversation/<int:conversation_id>/updates/', views.conversation_updates, name='conversation_updates'),
+    path('stream/', views.event_stream, name='event_stream'),
     path('start/<int:user_id>/', views.start_conversation, name='start_conversation'),
     path('conversation/<int:conversation_id>/delete/', views.delete_conversation, name='delete_conversation'),
 ]
\ No newline at end of file
@@ -1,25 +1,141 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Q, Max
-from .models import Conversation, Message
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from django.db.models import Count, Max, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from .models import Conversation, ConversationMember, Message
+from .realtime import get_broker, message_payload, publish_new_message, publish_read
+from .search import highlight, search_all_messages
+from tutoring_platform.pagination import CursorPage, fragment_response, is_fragment_request, paginate
 
 User = get_user_model()
 
+def inbox_conversations(user):
+    """
+    The user's conversations with everything the inbox shows, in one query.
+    
+    The latest message is denormalized onto Conversation; the unread count
+    (messages from others above the user's read watermark) comes from a
+    correlated subquery and the other participants are prefetched, so the
+    number of queries does not grow with the number of conversations.
+    """
+    last_read = ConversationMember.objects.filter(
+        conversation=OuterRef('pk'),
+        user=user
+    ).values('last_read_message_id')[:1]
+    unread = Message.objects.filter(
+        conversation=OuterRef('pk'),
+        id__gt=OuterRef('last_read_message_id')
+    ).exclude(
+        sender=user
+    ).values('conversation').annotate(count=Count('id')).values('count')
+    
+    return Conversation.objects.filter(
+        participants=user
+    ).annotate(
+        last_read_message_id=Subquery(last_read),
+    ).annotate(
+        unread_count=Coalesce(Subquery(unread), 0),
+    ).prefetch_related(
+        Prefetch(
+            'participants',
+            queryset=User.objects.exclude(id=user.id),
+            to_attr='other_participants'
+        )
+    )
+
 @login_required
 def inbox(request):
-    conversations = Conversation.objects.filter(
-        participants=request.user
-    ).annotate(
-        latest_message_time=Max('messages__created_at')
-    ).order_by('-latest_message_time')
+    conversations = inbox_conversations(request.user)
+    page = paginate(request, conversations, ('-last_message_at', '-id'), per_page=20)
+    
+    if is_fragment_request(request):
+        return fragment_response(request, 'messaging/_conversation_list.html', {'conversations': page}, page)
     
     return render(request, 'messaging/inbox.html', {
-        'conversations': conversations
+        'conversations': page,
+        'conversation_count': Conversation.objects.filter(participants=request.user).count(),
     })
 
+THREAD_WINDOW = 50
+
+def newest_first(querysets, before_id=None, limit=THREAD_WINDOW):
+    """
+    Up to ``limit`` rows below ``before_id`` in descending id order, and whether more remain.
+    
+    The querysets are read in turn (live messages, then the archive) and a
+    later one is only queried when the earlier ones run short. Archived
+    messages always have lower ids than live ones, so nothing is skipped.
+    """
+    items = []
+    for queryset in querysets:
+        if before_id is not None:
+            queryset = queryset.filter(id__lt=before_id)
+        items.extend(queryset.order_by('-id')[:limit + 1 - len(items)])
+        if len(items) > limit:
+            break
+    return items[:limit], len(items) > limit
+
+def window_page(request, items, next_before=None, path=None):
+    """A CursorPage whose next URL asks for the rows below id ``next_before``"""
+    page = CursorPage(items)
+    if next_before is not None:
+        params = request.GET.copy()
+        params['before'] = next_before
+        page.next_cursor = str(next_before)
+        page.next_url = f'{path or request.path}?{params.urlencode()}'
+    return page
+
+def before_param(request):
+    try:
+        return int(request.GET['before'])
+    except (KeyError, ValueError):
+        return None
+
+@login_required
+def search(request):
+    """Full-text search over the messages, live and archived, in the user's conversations"""
+    query = request.GET.get('q', '').strip()
+    items, has_more = newest_first(
+        [results.select_related('sender') for results in search_all_messages(request.user, query)],
+        before_param(request),
+        limit=20
+    )
+    page = window_page(request, items, items[-1].id if has_more else None)
+    for message in page:
+        message.highlighted = highlight(message.snippet)
+    context = {
+        'query': query,
+        'results': page,
+    }
+    
+    if is_fragment_request(request):
+        return fragment_response(request, 'messaging/_search_results.html', context, page)
+    
+    return render(request, 'messaging/search.html', context)
+
+def thread_window(request, conversation, before_id=None):
+    """The THREAD_WINDOW messages before before_id, oldest first, falling back to the archive"""
+    items, has_more = newest_first(
+        [conversation.messages.all(), conversation.archived_messages.all()],
+        before_id
+    )
+    next_before = items[-1].id if has_more else None
+    items.reverse()
+    return window_page(
+        request, items, next_before,
+        reverse('messaging:older_messages', args=[conversation.id])
+    )
+
 @login_required
 def conversation_detail(request, conversation_id):
     conversation = get_object_or_404(
@@ -28,20 +144,34 @@ def conversation_detail(request, conversation_id):
         participants=request.user
     )
     
-    conversation.messages.filter(
-        ~Q(sender=request.user), 
-        is_read=False
-    ).update(is_read=True)
+    # Only the newest window; older messages come from older_messages
+    page = thread_window(request, conversation)
+    read_watermark = conversation.get_read_watermark(request.user)
     
-    messages_list = conversation.messages.order_by('created_at')
-    other_participant = conversation.get_other_participant(request.user)
+    if page.items and conversation.mark_read(request.user, page.items[-1].id):
+        publish_read(conversation, request.user)
     
     return render(request, 'messaging/conversation.html', {
+        'thread_messages': page,
+        'read_watermark': read_watermark,
         'conversation': conversation,
-        'messages': messages_list,
-        'other_participant': other_participant,
+        'other_participant': conversation.get_other_participant(request.user),
     })
 
+@login_required
+def older_messages(request, conversation_id):
+    """The window of messages before ?before=, as a "load older" fragment"""
+    conversation = get_object_or_404(
+        Conversation,
+        id=conversation_id,
+        participants=request.user
+    )
+    page = thread_window(request, conversation, before_param(request))
+    return fragment_response(request, 'messaging/_message_list.html', {
+        'thread_messages': page,
+        'read_watermark': conversation.get_read_watermark(request.user),
+    }, page)
+
 @login_required
 def send_message(request, conversation_id):
     if request.method == 'POST':
@@ -53,12 +183,18 @@ def send_message(request, conversation_id):
         
         content = request.POST.get('content', '').strip()
         if content:
-            Message.objects.create(
+            message = Message.objects.create(
                 conversation=conversation,
                 sender=request.user,
                 content=content
             )
-            conversation.save()
+            publish_new_message(message)
+            
+            # The thread page sends with fetch and adds the message itself
+            if is_fragment_request(request):
+                return JsonResponse(message_payload(message), status=201)
+        elif is_fragment_request(request):
+            return JsonResponse({'error': 'Message cannot be empty.'}, status=400)
             
         # ✅ FIX: add namespace
         return redirect('messaging:conversation_detail', conversation_id=conversation_id)
@@ -73,26 +209,19 @@ def start_conversation(request, user_id):
         messages.error(request, "You can't start a conversation with yourself.")
         return redirect('messaging:inbox')   # ✅ add namespace
     
-    existing_conversation = Conversation.objects.filter(
-        participants=request.user
-    ).filter(
-        participants=other_user
-    ).first()
+    conversation, created = Conversation.get_or_create_direct(request.user, other_user)
     
-    if existing_conversation:
-        # ✅ FIX: add namespace
-        return redirect('messaging:conversation_detail', conversation_id=existing_conversation.id)
-    
-    conversation = Conversation.objects.create()
-    conversation.participants.add(request.user, other_user)
+    if not created:
+        return redirect('messaging:conversation_detail', conversation_id=conversation.id)
     
     initial_message = request.POST.get('message', '').strip()
     if initial_message:
-        Message.objects.create(
+        message = Message.objects.create(
             conversation=conversation,
             sender=request.user,
             content=initial_message
         )
+        publish_new_message(message)
     
     # ✅ FIX: add namespace
     return redirect('messaging:conversation_detail', conversation_id=conversation.id)
@@ -113,4 +242,127 @@ def delete_conversation(request, conversation_id):
     messages.success(request, 'Conversation deleted.')
     return redirect('messaging:inbox')   # ✅ add namespace
 
+@login_required
+@require_POST
+def mark_read(request, conversation_id):
+    """Move the user's read watermark while a thread is open"""
+    conversation = get_object_or_404(
+        Conversation,
+        id=conversation_id,
+        participants=request.user
+    )
+    try:
+        message_id = int(request.POST.get('message_id', ''))
+    except ValueError:
+        return JsonResponse({'error': 'message_id is required.'}, status=400)
+    
+    # Never mark past the newest message that actually exists
+    message_id = conversation.messages.filter(
+        id__lte=message_id
+    ).aggregate(last=Max('id'))['last'] or 0
+    if conversation.mark_read(request.user, message_id):
+        publish_read(conversation, request.user)
+    
+    return JsonResponse({'last_read_message_id': message_id})
+
+SYNC_BATCH_SIZE = 200
+MAX_WAIT_SECONDS = 30
+
+def updates_since(conversation, after_id):
+    """Messages after after_id in time order, plus every member's read watermark"""
+    new_messages = list(
+        conversation.messages.filter(
+            id__gt=after_id
+        ).select_related('sender').order_by('created_at', 'id')[:SYNC_BATCH_SIZE + 1]
+    )
+    has_more = len(new_messages) > SYNC_BATCH_SIZE
+    new_messages = new_messages[:SYNC_BATCH_SIZE]
+    watermarks = dict(conversation.memberships.values_list('user_id', 'last_read_message_id'))
+    
+    return {
+        'messages': [message_payload(message) for message in new_messages],
+        'read_watermarks': {str(user_id): last_read for user_id, last_read in watermarks.items()},
+        'last_message_id': new_messages[-1].id if new_messages else after_id,
+        'has_more': has_more,
+    }
+
+async def conversation_updates(request, conversation_id):
+    """
+    JSON delta of a thread: messages after ``?after=<message id>`` and read watermarks.
+    
+    With ``?wait=<seconds>`` and nothing new, the request is held open (up to
+    MAX_WAIT_SECONDS) until a message or read receipt arrives for this
+    conversation. Under ASGI a waiting client costs one idle coroutine; under
+    WSGI ``wait`` is ignored.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required.'}, status=401)
+    
+    conversation = await Conversation.objects.filter(id=conversation_id, participants=user).afirst()
+    if conversation is None:
+        return JsonResponse({'error': 'Conversation not found.'}, status=404)
+    
+    try:
+        after_id = max(0, int(request.GET.get('after', 0)))
+        wait = min(MAX_WAIT_SECONDS, max(0, int(request.GET.get('wait', 0))))
+    except ValueError:
+        return JsonResponse({'error': 'after and wait must be integers.'}, status=400)
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI a held request would pin a worker; answer at once
+        wait = 0
+    
+    get_updates = sync_to_async(updates_since)
+    payload = await get_updates(conversation, after_id)
+    if payload['messages'] or not wait:
+        return JsonResponse(payload)
+    
+    async with get_broker().subscribe(user.pk) as queue:
+        # Check again now that we are subscribed, so nothing slips in between
+        payload = await get_updates(conversation, after_id)
+        if payload['messages']:
+            return JsonResponse(payload)
+        async def next_event():
+            while True:
+                event = await queue.get()
+                if event.get('conversation_id') == conversation.id and event['type'] in ('message', 'read'):
+                    return event
+        
+        try:
+            await asyncio.wait_for(next_event(), wait)
+        except asyncio.TimeoutError:
+            pass
+    
+    return JsonResponse(await get_updates(conversation, after_id))
+
+KEEPALIVE_SECONDS = 20
+
+async def event_stream(request):
+    """
+    Server-Sent Events feed of the user's messages, unread counts and read receipts.
+    
+    Only served through the ASGI application. Under WSGI an endless stream
+    would hold a worker for good, so the answer is 204, which tells the
+    browser not to reconnect; pages then poll conversation_updates instead.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    response = StreamingHttpResponse(_sse_events(user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
 
+async def _sse_events(user_id):
+    yield 'retry: 5000\n\n'
+    async with get_broker().subscribe(user_id) as queue:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
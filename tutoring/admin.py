@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Subject, TutoringSession, Review
+from django.db import transaction
+from .models import (
+    AvailabilityException, AvailabilitySlot, Review, SessionEvent, SessionSeries,
+    Subject, TutoringSession, TutorWeeklyLoad, VolunteerHoursEntry, VolunteerHoursMonth,
+)
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
@@ -13,7 +17,70 @@ class TutoringSessionAdmin(admin.ModelAdmin):
     list_filter = ('status', 'subject', 'date_time')
     search_fields = ('student__username', 'tutor__username')
 
+@admin.register(SessionSeries)
+class SessionSeriesAdmin(admin.ModelAdmin):
+    list_display = ('student', 'tutor', 'subject', 'repeat', 'occurrences', 'created_at')
+    list_filter = ('repeat',)
+    search_fields = ('student__username', 'tutor__username')
+
+@admin.register(SessionEvent)
+class SessionEventAdmin(admin.ModelAdmin):
+    list_display = ('session', 'action', 'from_status', 'to_status', 'actor', 'created_at')
+    list_filter = ('action', 'to_status')
+    raw_id_fields = ('session', 'actor')
+    
+    def has_change_permission(self, request, obj=None):
+        # The log is append-only
+        return False
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('reviewer', 'reviewed', 'rating', 'created_at')
     list_filter = ('rating', 'created_at')
+
+@admin.register(VolunteerHoursEntry)
+class VolunteerHoursEntryAdmin(admin.ModelAdmin):
+    """Entries can be added (e.g. a negative correction) but never edited or deleted"""
+    list_display = ('tutor', 'hours', 'month', 'session', 'note', 'created_at')
+    list_filter = ('month',)
+    raw_id_fields = ('tutor', 'session')
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+    
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            VolunteerHoursEntry.apply(obj, sessions=1 if obj.session_id else 0)
+
+@admin.register(VolunteerHoursMonth)
+class VolunteerHoursMonthAdmin(admin.ModelAdmin):
+    list_display = ('tutor', 'month', 'hours', 'sessions_completed', 'updated_at')
+    list_filter = ('month',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(TutorWeeklyLoad)
+class TutorWeeklyLoadAdmin(admin.ModelAdmin):
+    list_display = ('tutor', 'week', 'hours')
+    list_filter = ('week',)
+    raw_id_fields = ('tutor',)
+
+@admin.register(AvailabilitySlot)
+class AvailabilitySlotAdmin(admin.ModelAdmin):
+    list_display = ('tutor', 'weekday', 'start_time', 'end_time')
+    list_filter = ('weekday',)
+    raw_id_fields = ('tutor',)
+
+@admin.register(AvailabilityException)
+class AvailabilityExceptionAdmin(admin.ModelAdmin):
+    list_display = ('tutor', 'date', 'start_time', 'end_time', 'is_available')
+    list_filter = ('is_available', 'date')
+    raw_id_fields = ('tutor',)
@@ -0,0 +1,160 @@
+"""
+Tutor availability: weekly slots, date exceptions and what is open to book.
+
+Slots and exceptions are in local time. A tutor is available for a window
+when one weekly slot (or one extra-hours exception) covers all of it and no
+away exception on that date overlaps it. Windows never cross midnight.
+"""
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .booking import BUSY_STATUSES
+from .models import AvailabilityException, AvailabilitySlot, TutoringSession
+
+BOOKING_DAYS = 14
+BOOKING_STEP = timedelta(minutes=30)
+# Starts are offered only where at least the shortest session fits
+MIN_DURATION = timedelta(hours=1)
+BOOKING_LEAD = timedelta(hours=2)
+
+
+def _covers(start_time, end_time):
+    return Q(start_time__lte=start_time, end_time__gte=end_time)
+
+
+def weekly_available(tutors, weekday, start_time, end_time):
+    """Tutors with a weekly slot covering ``start_time``-``end_time`` on ``weekday``"""
+    slots = AvailabilitySlot.objects.filter(_covers(start_time, end_time), weekday=weekday)
+    return tutors.filter(id__in=slots.values('tutor_id'))
+
+
+def available_between(tutors, start, end):
+    """Tutors free from ``start`` to ``end`` (aware datetimes on one local day)"""
+    start, end = timezone.localtime(start), timezone.localtime(end)
+    day, start_time, end_time = start.date(), start.time(), end.time()
+
+    weekly = AvailabilitySlot.objects.filter(_covers(start_time, end_time), weekday=day.weekday())
+    extra = AvailabilityException.objects.filter(
+        Q(start_time__isnull=True) | _covers(start_time, end_time),
+        date=day,
+        is_available=True
+    )
+    away = AvailabilityException.objects.filter(
+        Q(start_time__isnull=True) | Q(start_time__lt=end_time, end_time__gt=start_time),
+        date=day,
+        is_available=False
+    )
+    return tutors.filter(
+        Q(id__in=weekly.values('tutor_id')) | Q(id__in=extra.values('tutor_id'))
+    ).exclude(id__in=away.values('tutor_id'))
+
+
+def _subtract(windows, busy):
+    """Remove the ``busy`` intervals from ``windows``; both are lists of (start, end)"""
+    for busy_start, busy_end in busy:
+        remaining = []
+        for start, end in windows:
+            if busy_end <= start or busy_start >= end:
+                remaining.append((start, end))
+                continue
+            if start < busy_start:
+                remaining.append((start, busy_start))
+            if busy_end < end:
+                remaining.append((busy_end, end))
+        windows = remaining
+    return windows
+
+
+def open_windows(tutor_profile, days=BOOKING_DAYS, now=None):
+    """
+    Free (start, end) datetimes for ``tutor_profile`` over the next ``days``.
+
+    Three queries: the weekly slots, the exceptions in range and the
+    sessions already booked in range.
+    """
+    now = now or timezone.now()
+    first_day = timezone.localdate(now)
+    last_day = first_day + timedelta(days=days)
+
+    slots = list(AvailabilitySlot.objects.filter(tutor=tutor_profile))
+    exceptions = list(AvailabilityException.objects.filter(
+        tutor=tutor_profile, date__gte=first_day, date__lt=last_day
+    ))
+    booked = TutoringSession.objects.filter(
+        tutor_id=tutor_profile.user_id,
+        status__in=BUSY_STATUSES,
+        date_time__lt=timezone.make_aware(datetime.combine(last_day, datetime.min.time())),
+        end_time__gt=now
+    ).values_list('date_time', 'end_time')
+
+    def at(day, time):
+        return timezone.make_aware(datetime.combine(day, time))
+
+    windows = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        day_windows = [
+            (at(day, slot.start_time), at(day, slot.end_time))
+            for slot in slots if slot.weekday == day.weekday()
+        ]
+        away = []
+        for exception in exceptions:
+            if exception.date != day:
+                continue
+            if exception.start_time is None:
+                window = (at(day, datetime.min.time()), at(day + timedelta(days=1), datetime.min.time()))
+            else:
+                window = (at(day, exception.start_time), at(day, exception.end_time))
+            (day_windows if exception.is_available else away).append(window)
+        windows.extend(_subtract(day_windows, away))
+
+    earliest = now + BOOKING_LEAD
+    windows = _subtract(windows, [(now - timedelta(days=1), earliest)] + list(booked))
+    return sorted(windows)
+
+
+def open_starts(tutor_profile, **kwargs):
+    """Session start times on the BOOKING_STEP grid that have room for MIN_DURATION"""
+    starts = []
+    for start, end in open_windows(tutor_profile, **kwargs):
+        # Round up onto the grid
+        minutes = start.minute % (BOOKING_STEP.seconds // 60)
+        if minutes or start.second or start.microsecond:
+            start = start.replace(second=0, microsecond=0) + timedelta(minutes=BOOKING_STEP.seconds // 60 - minutes)
+        while start + MIN_DURATION <= end:
+            starts.append(start)
+            start += BOOKING_STEP
+    return sorted(set(starts))
+
+
+def is_open(tutor_profile, start, end):
+    """Whether ``start``-``end`` lies inside one open window"""
+    return any(
+        window_start <= start and end <= window_end
+        for window_start, window_end in open_windows(tutor_profile)
+    )
+
+
+def merge_slots(tutor_profile):
+    """Join overlapping or touching slots on the same weekday, so one slot covers a whole window"""
+    slots = list(AvailabilitySlot.objects.filter(tutor=tutor_profile).order_by('weekday', 'start_time'))
+    merged = []
+    for slot in slots:
+        previous = merged[-1] if merged else None
+        if previous and previous.weekday == slot.weekday and slot.start_time <= previous.end_time:
+            previous.end_time = max(previous.end_time, slot.end_time)
+        else:
+            merged.append(AvailabilitySlot(
+                tutor=tutor_profile,
+                weekday=slot.weekday,
+                start_time=slot.start_time,
+                end_time=slot.end_time
+            ))
+    if len(merged) == len(slots):
+        return
+    with transaction.atomic():
+        AvailabilitySlot.objects.filter(tutor=tutor_profile).delete()
+        AvailabilitySlot.objects.bulk_create(merged)
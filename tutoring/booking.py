@@ -0,0 +1,150 @@
+"""
+Creating sessions without double-booking anyone.
+
+Bookings for a tutor are serialized on the tutor's TutorProfile row, and a
+student's on their User row (always in that order, so two bookings cannot
+deadlock). Under the locks, one indexed overlap query checks every
+requested time against both people's sessions before anything is
+inserted, along with the tutor's weekly capacity (tutoring.capacity).
+On SQLite, where row locks don't exist, transactions start
+IMMEDIATE (see settings) and so serialize on the database write lock
+instead.
+"""
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import TutorProfile, User
+from .capacity import add_load, first_full_week, hours_by_week
+from .models import SessionSeries, TutoringSession
+from .summary import invalidate_dashboard_summary
+
+BUSY_STATUSES = ('pending', 'confirmed')
+REPEAT_DAYS = {'weekly': 7, 'biweekly': 14}
+MAX_OCCURRENCES = 26
+
+
+class BookingConflict(Exception):
+    """The requested time overlaps a session the tutor or student already has"""
+
+
+def find_conflicts(tutor_id, student_id, intervals):
+    """
+    Busy sessions of either person overlapping any of ``intervals``, in one
+    query; each branch uses the (person, date_time, end_time) indexes.
+    """
+    overlaps = reduce(or_, (Q(date_time__lt=end, end_time__gt=start) for start, end in intervals))
+    return list(TutoringSession.objects.filter(
+        Q(tutor_id=tutor_id) | Q(student_id=student_id),
+        overlaps,
+        status__in=BUSY_STATUSES
+    ).order_by('date_time'))
+
+
+def raise_for_conflicts(conflicts, tutor_id, several=False):
+    if not conflicts:
+        return
+    clash = conflicts[0]
+    when = f" on {timezone.localtime(clash.date_time):%b %d}" if several else ''
+    if clash.tutor_id == tutor_id:
+        raise BookingConflict(f'This tutor already has a session at that time{when}. Please pick another time.')
+    raise BookingConflict(f'You already have a session at that time{when}.')
+
+
+def raise_if_full(tutor_profile, hours):
+    week = first_full_week(tutor_profile, hours)
+    if week:
+        raise BookingConflict(
+            f'This tutor has no more hours free in the week of {week:%b %d}. Please pick another week.'
+        )
+
+
+def lock_participants(tutor_profile, student):
+    TutorProfile.objects.select_for_update().filter(pk=tutor_profile.pk).exists()
+    User.objects.select_for_update().filter(pk=student.pk).exists()
+
+
+def series_starts(first, repeat, occurrences=None, until=None):
+    """
+    Start times of a series from ``first``, for ``occurrences`` sessions or
+    through the date ``until``. Each keeps the first session's local wall-clock
+    time across daylight saving changes.
+    """
+    local = timezone.localtime(first).replace(tzinfo=None)
+    step = timedelta(days=REPEAT_DAYS[repeat])
+    starts = []
+    while len(starts) < (occurrences or MAX_OCCURRENCES):
+        if until and local.date() > until:
+            break
+        starts.append(timezone.make_aware(local))
+        local += step
+    return starts
+
+
+def book_session(student, tutor_profile, subject, date_time, duration_hours, notes=''):
+    """Create a pending session, or raise BookingConflict"""
+    end_time = date_time + timedelta(hours=float(duration_hours))
+    with transaction.atomic():
+        lock_participants(tutor_profile, student)
+        conflicts = find_conflicts(tutor_profile.user_id, student.pk, [(date_time, end_time)])
+        raise_for_conflicts(conflicts, tutor_profile.user_id)
+        hours = hours_by_week([date_time], duration_hours)
+        raise_if_full(tutor_profile, hours)
+        add_load(tutor_profile.pk, hours)
+        return TutoringSession.objects.create(
+            student=student,
+            tutor_id=tutor_profile.user_id,
+            subject=subject,
+            date_time=date_time,
+            duration_hours=duration_hours,
+            notes=notes,
+            status='pending'
+        )
+
+
+def book_series(student, tutor_profile, subject, starts, duration_hours, repeat, notes=''):
+    """
+    Create a SessionSeries and one pending session per start time, or raise
+    BookingConflict if any of them clashes. Checked with one query and
+    inserted with one bulk_create.
+    """
+    duration = timedelta(hours=float(duration_hours))
+    intervals = [(start, start + duration) for start in starts]
+    with transaction.atomic():
+        lock_participants(tutor_profile, student)
+        conflicts = find_conflicts(tutor_profile.user_id, student.pk, intervals)
+        raise_for_conflicts(conflicts, tutor_profile.user_id, several=True)
+        hours = hours_by_week(starts, duration_hours)
+        raise_if_full(tutor_profile, hours)
+        add_load(tutor_profile.pk, hours)
+
+        series = SessionSeries.objects.create(
+            student=student,
+            tutor_id=tutor_profile.user_id,
+            subject=subject,
+            repeat=repeat,
+            occurrences=len(starts)
+        )
+        # bulk_create skips TutoringSession.save(), so end_time is set here
+        TutoringSession.objects.bulk_create([
+            TutoringSession(
+                student=student,
+                tutor_id=tutor_profile.user_id,
+                subject=subject,
+                date_time=start,
+                end_time=end,
+                duration_hours=duration_hours,
+                notes=notes,
+                status='pending',
+                series=series
+            )
+            for start, end in intervals
+        ])
+    # ... and the post_save signals
+    invalidate_dashboard_summary(student.pk, tutor_profile.user_id)
+    return series
+
@@ -0,0 +1,132 @@
+"""
+Weekly booking capacity.
+
+A tutor's commitment level caps the hours they can be booked for in one
+week (Monday to Sunday, local time). TutorWeeklyLoad holds the hours
+already booked per week; booking adds to it under the tutor's row lock
+and status changes that free the time (cancel, reject, expire) take it
+back off, each in the same transaction as the session change. Checking
+whether a tutor is full is then an index lookup, not a sum over sessions.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import and_
+
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Value, When
+from django.utils import timezone
+
+from .models import TutorWeeklyLoad
+
+# Hours per week for each TutorProfile.commitment_level; None is no cap
+WEEKLY_CAPACITY = {
+    'casual': Decimal('2'),
+    'regular': Decimal('5'),
+    'dedicated': Decimal('10'),
+    'intensive': None,
+}
+# Sessions in these statuses use up the tutor's week
+COUNTED_STATUSES = ('pending', 'confirmed', 'completed')
+# A week with less room than the shortest bookable session counts as full
+SHORTEST_SESSION = Decimal('1')
+
+_HOURS = DecimalField(max_digits=5, decimal_places=1)
+
+
+def week_of(date_time):
+    day = timezone.localtime(date_time).date()
+    return day - timedelta(days=day.weekday())
+
+
+def weeks_between(start, end):
+    """Mondays of the weeks from ``start`` to ``end`` (datetimes), inclusive"""
+    week, last = week_of(start), week_of(end)
+    weeks = []
+    while week <= last:
+        weeks.append(week)
+        week += timedelta(days=7)
+    return weeks
+
+
+def hours_by_week(starts, duration_hours):
+    hours = defaultdict(Decimal)
+    for start in starts:
+        hours[week_of(start)] += Decimal(str(duration_hours))
+    return dict(hours)
+
+
+def capacity_of(tutor_profile):
+    return WEEKLY_CAPACITY.get(tutor_profile.commitment_level)
+
+
+def remaining_hours(tutor_profile, weeks):
+    """Hours still free in each of ``weeks``, or None for every week if the tutor has no cap"""
+    capacity = capacity_of(tutor_profile)
+    if capacity is None:
+        return None
+    booked = dict(
+        TutorWeeklyLoad.objects.filter(tutor=tutor_profile, week__in=weeks).values_list('week', 'hours')
+    )
+    return {week: capacity - booked.get(week, 0) for week in weeks}
+
+
+def first_full_week(tutor_profile, hours):
+    """The first week in ``hours`` ({week: hours}) that would go over capacity, or None"""
+    remaining = remaining_hours(tutor_profile, list(hours))
+    if remaining is None:
+        return None
+    for week in sorted(hours):
+        if hours[week] > remaining[week]:
+            return week
+    return None
+
+
+def _adjust(loads, hours):
+    loads.update(hours=F('hours') + Case(
+        *[When(week=week, then=Value(amount)) for week, amount in hours.items()],
+        default=Value(Decimal('0')),
+        output_field=_HOURS
+    ))
+
+
+def add_load(tutor_profile_id, hours):
+    """Add ``hours`` ({week: hours}) to a tutor's weeks; call inside the booking transaction"""
+    TutorWeeklyLoad.objects.bulk_create(
+        [TutorWeeklyLoad(tutor_id=tutor_profile_id, week=week) for week in hours],
+        ignore_conflicts=True
+    )
+    _adjust(TutorWeeklyLoad.objects.filter(tutor_id=tutor_profile_id, week__in=list(hours)), hours)
+
+
+def release_load(sessions):
+    """
+    Take the hours of ``sessions`` ((tutor user id, date_time, duration_hours)
+    rows) back off their tutors' weeks, with one UPDATE per tutor.
+    """
+    by_tutor = defaultdict(lambda: defaultdict(Decimal))
+    for tutor_id, date_time, duration_hours in sessions:
+        by_tutor[tutor_id][week_of(date_time)] -= Decimal(str(duration_hours))
+    for tutor_id, hours in by_tutor.items():
+        _adjust(TutorWeeklyLoad.objects.filter(tutor__user_id=tutor_id, week__in=list(hours)), hours)
+
+
+def exclude_full(tutors, weeks):
+    """TutorProfiles in ``tutors`` with room for a session in at least one of ``weeks``"""
+    tutors = tutors.alias(full_above=Case(
+        *[
+            When(commitment_level=level, then=Value(hours - SHORTEST_SESSION))
+            for level, hours in WEEKLY_CAPACITY.items() if hours is not None
+        ],
+        default=None,
+        output_field=_HOURS
+    ))
+    full = [
+        Exists(TutorWeeklyLoad.objects.filter(
+            tutor=OuterRef('pk'),
+            week=week,
+            hours__gt=OuterRef('full_above')
+        ))
+        for week in weeks
+    ]
+    return tutors.exclude(reduce(and_, full))
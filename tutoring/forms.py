@@ -1,9 +1,21 @@
 from django import forms
 from django.utils import timezone
-from .models import Subject, TutoringSession, Review
-from datetime import date, datetime
+from accounts.models import TutorProfile
+from .availability import is_open, open_starts
+from .booking import MAX_OCCURRENCES, REPEAT_DAYS, series_starts
+from .capacity import SHORTEST_SESSION, first_full_week, hours_by_week, remaining_hours, week_of
+from .models import AvailabilityException, AvailabilitySlot, Subject, TutoringSession, Review, WEEKDAY_CHOICES
+from datetime import date, datetime, timedelta
 
 class TutorSearchForm(forms.Form):
+    q = forms.CharField(
+        max_length=200,
+        required=False,
+        widget=forms.TextInput(attrs={
+            'placeholder': 'Name, subject, specialization...',
+            'class': 'form-control'
+        })
+    )
     subject = forms.ModelChoiceField(
         queryset=Subject.objects.all(),
         required=False,
@@ -27,6 +39,37 @@ class TutorSearchForm(forms.Form):
             'class': 'form-control'
         })
     )
+    weekday = forms.TypedChoiceField(
+        choices=[('', 'Any day')] + WEEKDAY_CHOICES,
+        coerce=int,
+        empty_value=None,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    available_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    available_from = forms.TimeField(
+        required=False,
+        widget=forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'})
+    )
+    available_until = forms.TimeField(
+        required=False,
+        widget=forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'})
+    )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        # A date also applies the tutors' exceptions for that day, so it wins over a weekday
+        day = cleaned_data.get('available_date') or cleaned_data.get('weekday')
+        window = [day, cleaned_data.get('available_from'), cleaned_data.get('available_until')]
+        if any(value is not None for value in window):
+            if any(value is None for value in window):
+                raise forms.ValidationError("Choose a day or a date and both times to search by availability.")
+            if window[1] >= window[2]:
+                raise forms.ValidationError("The end time must be after the start time.")
+        return cleaned_data
 
 class BookingForm(forms.Form):
     subject = forms.ModelChoiceField(
@@ -45,6 +88,11 @@ class BookingForm(forms.Form):
         required=True,
         widget=forms.Select(attrs={'class': 'form-select'})
     )
+    slot = forms.TypedChoiceField(
+        label='Available times',
+        coerce=datetime.fromisoformat,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
     preferred_date = forms.DateField(
         required=True,
         widget=forms.DateInput(attrs={
@@ -60,6 +108,27 @@ class BookingForm(forms.Form):
             'type': 'time'
         })
     )
+    repeat = forms.ChoiceField(
+        choices=[
+            ('', 'Just this once'),
+            ('weekly', 'Every week'),
+            ('biweekly', 'Every two weeks'),
+        ],
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    occurrences = forms.IntegerField(
+        label='Number of sessions',
+        min_value=2,
+        max_value=MAX_OCCURRENCES,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    repeat_until = forms.DateField(
+        label='Or until',
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
     notes = forms.CharField(
         required=False,
         widget=forms.Textarea(attrs={
@@ -71,25 +140,80 @@ class BookingForm(forms.Form):
 
     def __init__(self, tutor, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.tutor = tutor
         self.fields['subject'].queryset = tutor.subjects.all()
+        
+        # Tutors who have published weekly slots are booked from their open times;
+        # the others still take a free-form date and time
+        self.uses_slots = tutor.availability_slots.exists()
+        if self.uses_slots:
+            del self.fields['preferred_date']
+            del self.fields['preferred_time']
+            starts = open_starts(tutor)
+            # Weeks the tutor's commitment is already used up are not offered
+            remaining = remaining_hours(tutor, sorted({week_of(start) for start in starts}))
+            if remaining is not None:
+                starts = [start for start in starts if remaining[week_of(start)] >= SHORTEST_SESSION]
+            self.fields['slot'].choices = [
+                (start.isoformat(), f"{timezone.localtime(start):%a %b %d, %I:%M %p}")
+                for start in starts
+            ]
+        else:
+            del self.fields['slot']
 
     def clean(self):
         cleaned_data = super().clean()
-        preferred_date = cleaned_data.get('preferred_date')
-        preferred_time = cleaned_data.get('preferred_time')
+        if self.uses_slots:
+            session_datetime = cleaned_data.get('slot')
+        else:
+            preferred_date = cleaned_data.get('preferred_date')
+            preferred_time = cleaned_data.get('preferred_time')
+            session_datetime = None
+            if preferred_date and preferred_time:
+                session_datetime = timezone.make_aware(datetime.combine(preferred_date, preferred_time))
         
-        if preferred_date and preferred_time:
-            # Create naive datetime
-            naive_datetime = datetime.combine(preferred_date, preferred_time)
-            # Make it timezone-aware
-            session_datetime = timezone.make_aware(naive_datetime)
-            
+        if session_datetime:
             # Compare with current timezone-aware datetime
             if session_datetime <= timezone.now():
                 raise forms.ValidationError("You cannot book a session in the past.")
+            duration = cleaned_data.get('duration_hours')
+            if self.uses_slots and duration:
+                session_end = session_datetime + timedelta(hours=float(duration))
+                if not is_open(self.tutor, session_datetime, session_end):
+                    raise forms.ValidationError(
+                        "That time is no longer open for this length of session. Please pick another."
+                    )
+            cleaned_data['date_time'] = session_datetime
+            self.plan_series(cleaned_data, session_datetime)
+            if duration:
+                full_week = first_full_week(self.tutor, hours_by_week(cleaned_data['starts'], duration))
+                if full_week:
+                    raise forms.ValidationError(
+                        f"{self.tutor.user.first_name} has no more hours free in the week of {full_week:%b %d}. "
+                        "Please pick another week or a shorter session."
+                    )
         
         return cleaned_data
 
+    def plan_series(self, cleaned_data, first):
+        """Work out the start of every session in a series; later ones are checked for clashes when booked"""
+        repeat = cleaned_data.get('repeat')
+        occurrences = cleaned_data.get('occurrences')
+        repeat_until = cleaned_data.get('repeat_until')
+        cleaned_data['starts'] = [first]
+        if not repeat:
+            return
+        if bool(occurrences) == bool(repeat_until):
+            raise forms.ValidationError("For a repeating booking, give either a number of sessions or an end date.")
+        if repeat_until:
+            last_allowed = timezone.localdate(first) + timedelta(days=REPEAT_DAYS[repeat] * (MAX_OCCURRENCES - 1))
+            if repeat_until > last_allowed:
+                raise forms.ValidationError(f"A series can have at most {MAX_OCCURRENCES} sessions.")
+        starts = series_starts(first, repeat, occurrences=occurrences, until=repeat_until)
+        if len(starts) < 2:
+            raise forms.ValidationError("The end date must leave room for at least two sessions.")
+        cleaned_data['starts'] = starts
+
 class ReviewForm(forms.ModelForm):
     class Meta:
         model = Review
@@ -105,4 +229,55 @@ class ReviewForm(forms.ModelForm):
         labels = {
             'rating': 'Rating',
             'comment': 'Your Review'
-        }
\ No newline at end of file
+        }
+class AvailabilitySlotForm(forms.ModelForm):
+    class Meta:
+        model = AvailabilitySlot
+        fields = ['weekday', 'start_time', 'end_time']
+        widgets = {
+            'weekday': forms.Select(attrs={'class': 'form-select'}),
+            'start_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+            'end_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+        }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        if start_time and end_time and start_time >= end_time:
+            raise forms.ValidationError("The end time must be after the start time.")
+        return cleaned_data
+
+class AvailabilityExceptionForm(forms.ModelForm):
+    class Meta:
+        model = AvailabilityException
+        fields = ['date', 'start_time', 'end_time', 'is_available']
+        widgets = {
+            'date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+            'start_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+            'end_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
+            'is_available': forms.Select(
+                choices=[(False, 'Away'), (True, 'Extra hours')],
+                attrs={'class': 'form-select'}
+            ),
+        }
+        labels = {
+            'is_available': 'Type',
+        }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        if (start_time is None) != (end_time is None):
+            raise forms.ValidationError("Give both times, or neither for the whole day.")
+        if start_time and start_time >= end_time:
+            raise forms.ValidationError("The end time must be after the start time.")
+        return cleaned_data
+
+AvailabilitySlotFormSet = forms.inlineformset_factory(
+    TutorProfile, AvailabilitySlot, form=AvailabilitySlotForm, extra=2, can_delete=True
+)
+AvailabilityExceptionFormSet = forms.inlineformset_factory(
+    TutorProfile, AvailabilityException, form=AvailabilityExceptionForm, extra=1, can_delete=True
+)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import TutorProfile
+from tutoring.search import update_search_document
+
+class Command(BaseCommand):
+    help = 'Rebuild the tutor search documents and full-text index'
+    
+    def handle(self, *args, **options):
+        count = 0
+        for tutor_profile in TutorProfile.objects.select_related('user').iterator():
+            update_search_document(tutor_profile)
+            count += 1
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search documents for {count} tutors')
+        )
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from accounts.models import TutorProfile
+from tutoring.models import VolunteerHoursEntry, VolunteerHoursMonth
+from tutoring.page_cache import invalidate_public_pages
+
+class Command(BaseCommand):
+    help = 'Recompute volunteer hour totals and monthly rollups from the ledger'
+    
+    def handle(self, *args, **options):
+        count = 0
+        for tutor_profile in TutorProfile.objects.only('id').iterator():
+            entries = VolunteerHoursEntry.objects.filter(tutor=tutor_profile)
+            with transaction.atomic():
+                # Lock the profile so completions for this tutor wait for the rebuild
+                TutorProfile.objects.select_for_update().filter(pk=tutor_profile.pk).exists()
+                months = entries.values('month').annotate(hours=Sum('hours'), sessions=Count('session'))
+                VolunteerHoursMonth.objects.filter(tutor=tutor_profile).delete()
+                VolunteerHoursMonth.objects.bulk_create([
+                    VolunteerHoursMonth(
+                        tutor=tutor_profile,
+                        month=row['month'],
+                        hours=row['hours'],
+                        sessions_completed=row['sessions']
+                    )
+                    for row in months
+                ])
+                TutorProfile.objects.filter(pk=tutor_profile.pk).update(
+                    volunteer_hours_completed=entries.aggregate(total=Sum('hours'))['total'] or Decimal('0'),
+                    updated_at=timezone.now()
+                )
+            count += 1
+        
+        invalidate_public_pages()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt volunteer hours for {count} tutors')
+        )
@@ -0,0 +1,36 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import TutorProfile
+from tutoring.capacity import COUNTED_STATUSES, week_of
+from tutoring.models import TutoringSession, TutorWeeklyLoad
+
+class Command(BaseCommand):
+    help = 'Recompute the hours booked with each tutor per week from their sessions'
+    
+    def handle(self, *args, **options):
+        count = 0
+        for tutor_profile in TutorProfile.objects.only('id', 'user_id').iterator():
+            with transaction.atomic():
+                # Lock the profile so bookings for this tutor wait for the rebuild
+                TutorProfile.objects.select_for_update().filter(pk=tutor_profile.pk).exists()
+                weeks = defaultdict(Decimal)
+                sessions = TutoringSession.objects.filter(
+                    tutor_id=tutor_profile.user_id,
+                    status__in=COUNTED_STATUSES
+                ).values_list('date_time', 'duration_hours')
+                for date_time, duration_hours in sessions:
+                    weeks[week_of(date_time)] += duration_hours
+                TutorWeeklyLoad.objects.filter(tutor=tutor_profile).delete()
+                TutorWeeklyLoad.objects.bulk_create([
+                    TutorWeeklyLoad(tutor=tutor_profile, week=week, hours=hours)
+                    for week, hours in weeks.items()
+                ])
+            count += 1
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt weekly loads for {count} tutors')
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tutoring.page_cache import invalidate_tutor_pages
+from tutoring.ranking import recompute_rank_scores
+
+class Command(BaseCommand):
+    help = 'Recompute the stored search ranking score of every tutor (run daily)'
+    
+    def handle(self, *args, **options):
+        total, changed = recompute_rank_scores()
+        if changed:
+            # Bulk updates skip the signals; the featured order may have changed
+            invalidate_tutor_pages()
+        self.stdout.write(
+            self.style.SUCCESS(f'Recomputed rank scores for {total} tutors ({changed} changed)')
+        )
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from accounts.models import TutorProfile
+from tutoring.models import Review
+from tutoring.page_cache import invalidate_tutor_pages
+from tutoring.ranking import compute_rank_score, ranking_queryset
+
+COUNTER_FIELDS = ['rating', 'total_reviews', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+class Command(BaseCommand):
+    help = 'Recompute tutor rating counters, and the rank scores built on them, from the reviews in one grouped query'
+    
+    def handle(self, *args, **options):
+        totals = {
+            row.pop('reviewed'): row
+            for row in Review.objects.values('reviewed').annotate(
+                total_reviews=Count('id'),
+                rating_sum=Sum('rating'),
+                **{f'rating_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)}
+            ).order_by()
+        }
+        
+        now = timezone.now()
+        changed = []
+        for tutor_profile in ranking_queryset().iterator():
+            row = totals.get(tutor_profile.user_id, {})
+            expected = {field: row.get(field, 0) for field in COUNTER_FIELDS if field != 'rating'}
+            expected['rating'] = (
+                round(Decimal(expected['rating_sum']) / expected['total_reviews'], 2)
+                if expected['total_reviews'] else Decimal('0.00')
+            )
+            if any(getattr(tutor_profile, field) != value for field, value in expected.items()):
+                for field, value in expected.items():
+                    setattr(tutor_profile, field, value)
+                tutor_profile.rank_score = compute_rank_score(tutor_profile, tutor_profile.subject_count, now)
+                tutor_profile.updated_at = now
+                changed.append(tutor_profile)
+        
+        TutorProfile.objects.bulk_update(changed, [*COUNTER_FIELDS, 'rank_score', 'updated_at'], batch_size=500)
+        if changed:
+            invalidate_tutor_pages(*[tutor_profile.pk for tutor_profile in changed])
+        self.stdout.write(
+            self.style.SUCCESS(f'Reconciled ratings; {len(changed)} tutors were out of date')
+        )
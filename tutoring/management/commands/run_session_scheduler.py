@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tutoring.scheduler import run_once
+
+class Command(BaseCommand):
+    help = 'Expire stale bookings, flag finished sessions and send reminders'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running instead of exiting after one pass')
+        parser.add_argument('--interval', type=int, default=60,
+                            help='Seconds between passes with --loop')
+    
+    def handle(self, *args, **options):
+        while True:
+            counts = run_once()
+            self.stdout.write(
+                self.style.SUCCESS(', '.join(f'{name}: {count}' for name, count in counts.items()))
+            )
+            if not options['loop']:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
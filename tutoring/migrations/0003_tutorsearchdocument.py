@@ -0,0 +1,145 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SQLITE_FORWARDS = [
+    """
+    CREATE VIRTUAL TABLE tutoring_tutorsearch_fts USING fts5(
+        name, subjects, specializations, certifications,
+        teaching_philosophy, languages_spoken, location,
+        content='tutoring_tutorsearchdocument',
+        content_rowid='tutor_id',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER tutoring_tutorsearch_ai AFTER INSERT ON tutoring_tutorsearchdocument BEGIN
+        INSERT INTO tutoring_tutorsearch_fts(rowid, name, subjects, specializations, certifications,
+                                             teaching_philosophy, languages_spoken, location)
+        VALUES (new.tutor_id, new.name, new.subjects, new.specializations, new.certifications,
+                new.teaching_philosophy, new.languages_spoken, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER tutoring_tutorsearch_ad AFTER DELETE ON tutoring_tutorsearchdocument BEGIN
+        INSERT INTO tutoring_tutorsearch_fts(tutoring_tutorsearch_fts, rowid, name, subjects, specializations,
+                                             certifications, teaching_philosophy, languages_spoken, location)
+        VALUES ('delete', old.tutor_id, old.name, old.subjects, old.specializations, old.certifications,
+                old.teaching_philosophy, old.languages_spoken, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER tutoring_tutorsearch_au AFTER UPDATE ON tutoring_tutorsearchdocument BEGIN
+        INSERT INTO tutoring_tutorsearch_fts(tutoring_tutorsearch_fts, rowid, name, subjects, specializations,
+                                             certifications, teaching_philosophy, languages_spoken, location)
+        VALUES ('delete', old.tutor_id, old.name, old.subjects, old.specializations, old.certifications,
+                old.teaching_philosophy, old.languages_spoken, old.location);
+        INSERT INTO tutoring_tutorsearch_fts(rowid, name, subjects, specializations, certifications,
+                                             teaching_philosophy, languages_spoken, location)
+        VALUES (new.tutor_id, new.name, new.subjects, new.specializations, new.certifications,
+                new.teaching_philosophy, new.languages_spoken, new.location);
+    END
+    """,
+]
+
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS tutoring_tutorsearch_au",
+    "DROP TRIGGER IF EXISTS tutoring_tutorsearch_ad",
+    "DROP TRIGGER IF EXISTS tutoring_tutorsearch_ai",
+    "DROP TABLE IF EXISTS tutoring_tutorsearch_fts",
+]
+
+POSTGRES_FORWARDS = [
+    """
+    ALTER TABLE tutoring_tutorsearchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(subjects, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(specializations, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(certifications, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(languages_spoken, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(teaching_philosophy, '')), 'D') ||
+        setweight(to_tsvector('simple', coalesce(location, '')), 'D')
+    ) STORED
+    """,
+    """
+    ALTER TABLE tutoring_tutorsearchdocument ADD COLUMN location_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(location, ''))
+    ) STORED
+    """,
+    "CREATE INDEX tutoring_tutorsearch_vector_gin ON tutoring_tutorsearchdocument USING GIN (search_vector)",
+    "CREATE INDEX tutoring_tutorsearch_location_gin ON tutoring_tutorsearchdocument USING GIN (location_vector)",
+]
+
+POSTGRES_BACKWARDS = [
+    "DROP INDEX IF EXISTS tutoring_tutorsearch_location_gin",
+    "DROP INDEX IF EXISTS tutoring_tutorsearch_vector_gin",
+    "ALTER TABLE tutoring_tutorsearchdocument DROP COLUMN IF EXISTS location_vector",
+    "ALTER TABLE tutoring_tutorsearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_FORWARDS,
+        'postgresql': POSTGRES_FORWARDS,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_BACKWARDS,
+        'postgresql': POSTGRES_BACKWARDS,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def build_documents(apps, schema_editor):
+    TutorProfile = apps.get_model('accounts', 'TutorProfile')
+    TutorSearchDocument = apps.get_model('tutoring', 'TutorSearchDocument')
+    
+    documents = []
+    for profile in TutorProfile.objects.select_related('user').prefetch_related('subjects'):
+        user = profile.user
+        documents.append(TutorSearchDocument(
+            tutor=profile,
+            name=f"{user.first_name} {user.last_name} {user.username}".strip(),
+            subjects=' '.join(subject.name for subject in profile.subjects.all()),
+            specializations=profile.specializations,
+            certifications=profile.certifications,
+            teaching_philosophy=profile.teaching_philosophy,
+            languages_spoken=profile.languages_spoken,
+            location=user.location,
+        ))
+    TutorSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_tutorprofile_approval_date_tutorprofile_is_approved_and_more'),
+        ('tutoring', '0002_alter_review_options_alter_review_comment_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorSearchDocument',
+            fields=[
+                ('tutor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='accounts.tutorprofile')),
+                ('name', models.CharField(blank=True, max_length=300)),
+                ('subjects', models.TextField(blank=True)),
+                ('specializations', models.TextField(blank=True)),
+                ('certifications', models.TextField(blank=True)),
+                ('teaching_philosophy', models.TextField(blank=True)),
+                ('languages_spoken', models.CharField(blank=True, max_length=200)),
+                ('location', models.CharField(blank=True, max_length=100)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
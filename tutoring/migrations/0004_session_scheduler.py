@@ -0,0 +1,81 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:06
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_end_times(apps, schema_editor):
+    TutoringSession = apps.get_model('tutoring', 'TutoringSession')
+    sessions = []
+    for session in TutoringSession.objects.only('id', 'date_time', 'duration_hours').iterator():
+        session.end_time = session.date_time + timedelta(hours=float(session.duration_hours))
+        sessions.append(session)
+    TutoringSession.objects.bulk_update(sessions, ['end_time'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring', '0003_tutorsearchdocument'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('send_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('claimed_by', models.CharField(blank=True, max_length=64)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tutoringsession',
+            name='awaiting_completion',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='tutoringsession',
+            name='end_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='tutoringsession',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='pending', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='tutoringsession',
+            index=models.Index(fields=['status', 'date_time'], name='session_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutoringsession',
+            index=models.Index(fields=['status', 'end_time'], name='session_status_end_idx'),
+        ),
+        migrations.AddField(
+            model_name='sessionreminder',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='session_reminders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='sessionreminder',
+            name='session',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='tutoring.tutoringsession'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionreminder',
+            index=models.Index(fields=['sent_at', 'send_at'], name='reminder_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='sessionreminder',
+            constraint=models.UniqueConstraint(fields=('session', 'recipient'), name='unique_session_reminder'),
+        ),
+        migrations.RunPython(fill_end_times, migrations.RunPython.noop),
+    ]
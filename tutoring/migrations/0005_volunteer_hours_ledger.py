@@ -0,0 +1,103 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:08
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def build_ledger(apps, schema_editor):
+    """
+    One entry per completed session, plus an opening balance for hours that
+    were credited some other way (e.g. edited in the admin), then the rollups.
+    """
+    TutorProfile = apps.get_model('accounts', 'TutorProfile')
+    TutoringSession = apps.get_model('tutoring', 'TutoringSession')
+    VolunteerHoursEntry = apps.get_model('tutoring', 'VolunteerHoursEntry')
+    VolunteerHoursMonth = apps.get_model('tutoring', 'VolunteerHoursMonth')
+
+    profile_ids = dict(TutorProfile.objects.values_list('user_id', 'id'))
+    entries = []
+    for session in TutoringSession.objects.filter(status='completed').iterator():
+        if session.tutor_id not in profile_ids:
+            continue
+        entries.append(VolunteerHoursEntry(
+            tutor_id=profile_ids[session.tutor_id],
+            session_id=session.id,
+            hours=session.duration_hours,
+            month=timezone.localtime(session.date_time).date().replace(day=1),
+        ))
+    VolunteerHoursEntry.objects.bulk_create(entries, batch_size=500)
+
+    totals = dict(
+        VolunteerHoursEntry.objects.values('tutor').annotate(total=models.Sum('hours')).values_list('tutor', 'total')
+    )
+    for profile in TutorProfile.objects.iterator():
+        ledger_total = totals.get(profile.id) or Decimal('0')
+        missing = Decimal(profile.volunteer_hours_completed) - ledger_total
+        if missing > 0:
+            VolunteerHoursEntry.objects.create(
+                tutor_id=profile.id,
+                hours=missing,
+                month=profile.volunteer_start_date.replace(day=1),
+                note='Balance before the hours ledger',
+            )
+            ledger_total += missing
+        TutorProfile.objects.filter(pk=profile.pk).update(volunteer_hours_completed=ledger_total)
+
+    VolunteerHoursMonth.objects.bulk_create([
+        VolunteerHoursMonth(
+            tutor_id=row['tutor'],
+            month=row['month'],
+            hours=row['hours'],
+            sessions_completed=row['sessions'],
+        )
+        for row in VolunteerHoursEntry.objects.values('tutor', 'month').annotate(
+            hours=models.Sum('hours'),
+            sessions=models.Count('session'),
+        )
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_volunteer_hours_decimal'),
+        ('tutoring', '0004_session_scheduler'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolunteerHoursEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hours', models.DecimalField(decimal_places=1, max_digits=5)),
+                ('month', models.DateField(help_text='First day of the month the hours count towards')),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='volunteer_hours_entry', to='tutoring.tutoringsession')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='volunteer_hours_entries', to='accounts.tutorprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'Volunteer hours entries',
+                'indexes': [models.Index(fields=['tutor', 'month'], name='hours_entry_tutor_month_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VolunteerHoursMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('hours', models.DecimalField(decimal_places=1, default=0, max_digits=6)),
+                ('sessions_completed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_hours', to='accounts.tutorprofile')),
+            ],
+            options={
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('tutor', 'month'), name='unique_tutor_month_hours')],
+            },
+        ),
+        migrations.RunPython(build_ledger, migrations.RunPython.noop),
+    ]
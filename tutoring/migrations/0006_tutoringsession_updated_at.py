@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring', '0005_volunteer_hours_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutoringsession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
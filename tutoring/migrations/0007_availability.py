@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_user_profile_picture_renditions'),
+        ('tutoring', '0006_tutoringsession_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('is_available', models.BooleanField(default=False)),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_exceptions', to='accounts.tutorprofile')),
+            ],
+            options={
+                'ordering': ['date', 'start_time'],
+                'indexes': [models.Index(fields=['date', 'is_available'], name='exception_date_idx'), models.Index(fields=['tutor', 'date'], name='exception_tutor_date_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('end_time__isnull', True), ('start_time__isnull', True)), ('start_time__lt', models.F('end_time')), _connector='OR'), name='exception_starts_before_end')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AvailabilitySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_slots', to='accounts.tutorprofile')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+                'indexes': [models.Index(fields=['weekday', 'start_time', 'end_time'], name='slot_window_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('start_time__lt', models.F('end_time'))), name='slot_starts_before_end')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring', '0007_availability'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tutoringsession',
+            index=models.Index(fields=['tutor', 'date_time', 'end_time'], name='session_tutor_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutoringsession',
+            index=models.Index(fields=['student', 'date_time', 'end_time'], name='session_student_time_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_user_profile_picture_renditions'),
+        ('tutoring', '0010_session_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorWeeklyLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField(help_text='Monday of the week')),
+                ('hours', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_loads', to='accounts.tutorprofile')),
+            ],
+            options={
+                'ordering': ['week'],
+                'constraints': [models.UniqueConstraint(fields=('tutor', 'week'), name='unique_tutor_week_load')],
+            },
+        ),
+    ]
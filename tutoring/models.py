@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DecimalField, F, FloatField
+from django.db.models.functions import Cast, Round
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -13,12 +15,33 @@ class Subject(models.Model):
     def __str__(self):
         return self.name
 
+class SessionSeries(models.Model):
+    """Sessions booked together at a fixed weekly or fortnightly time"""
+    REPEAT_CHOICES = [
+        ('weekly', 'Every week'),
+        ('biweekly', 'Every two weeks'),
+    ]
+    
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='student_series')
+    tutor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tutor_series')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    repeat = models.CharField(max_length=10, choices=REPEAT_CHOICES)
+    occurrences = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'session series'
+    
+    def __str__(self):
+        return f"{self.student.username} with {self.tutor.username}: {self.subject} {self.get_repeat_display().lower()}"
+
 class TutoringSession(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
+        ('expired', 'Expired'),
     ]
     
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='student_sessions')
@@ -29,6 +52,32 @@ class TutoringSession(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Stored so the scheduler can select finished sessions with an indexed range
+    end_time = models.DateTimeField(null=True, blank=True)
+    # Set by the scheduler once a confirmed session has ended
+    awaiting_completion = models.BooleanField(default=False)
+    series = models.ForeignKey(SessionSeries, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions')
+    # Queryset updates of sessions must set this themselves
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'date_time'], name='session_status_start_idx'),
+            models.Index(fields=['status', 'end_time'], name='session_status_end_idx'),
+            # Overlap checks when booking (tutoring.booking)
+            models.Index(fields=['tutor', 'date_time', 'end_time'], name='session_tutor_time_idx'),
+            models.Index(fields=['student', 'date_time', 'end_time'], name='session_student_time_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.end_time = self.get_session_end_time()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields) | {'updated_at'}
+            if {'date_time', 'duration_hours'} & update_fields:
+                update_fields.add('end_time')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
     
     # Add the completion methods here
     def get_session_end_time(self):
@@ -40,7 +89,8 @@ class TutoringSession(models.Model):
     
     def can_be_completed(self):
         """Check if the session can be marked as completed"""
-        if self.status != 'confirmed':
+        from .transitions import can_transition
+        if not can_transition(self, 'complete'):
             return False
             
         session_end_time = self.get_session_end_time()
@@ -57,22 +107,36 @@ class TutoringSession(models.Model):
                 return time_left
         return None
     
-    def mark_as_completed(self):
+    def mark_as_completed(self, actor=None):
         """Mark session as completed and add volunteer hours to tutor"""
         if not self.can_be_completed():
             raise ValueError("Session cannot be completed yet - it hasn't finished")
         
-        # Update session status
-        self.status = 'completed'
-        self.save()
-        
-        # Add volunteer hours to tutor's profile
-        tutor_profile = self.tutor.tutorprofile
-        tutor_profile.volunteer_hours_completed += float(self.duration_hours)
-        tutor_profile.save()
+        from .transitions import apply_transition
+        with transaction.atomic():
+            # Only one request can move the session out of 'confirmed'
+            if not apply_transition(self, 'complete', actor, awaiting_completion=False):
+                raise ValueError("Session has already been completed")
+            VolunteerHoursEntry.record(self)
         
         return True
 
+class SessionEvent(models.Model):
+    """One applied status change of a session, appended by tutoring.transitions"""
+    session = models.ForeignKey(TutoringSession, on_delete=models.CASCADE, related_name='events')
+    # Empty for changes made by the scheduler
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    action = models.CharField(max_length=10)
+    from_status = models.CharField(max_length=10, choices=TutoringSession.STATUS_CHOICES)
+    to_status = models.CharField(max_length=10, choices=TutoringSession.STATUS_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['created_at', 'id']
+    
+    def __str__(self):
+        return f"Session {self.session_id}: {self.from_status} -> {self.to_status} ({self.action})"
+
 class Review(models.Model):
     session = models.OneToOneField(TutoringSession, on_delete=models.CASCADE, related_name='review')
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='given_reviews')
@@ -86,3 +150,241 @@ class Review(models.Model):
     
     def __str__(self):
         return f"{self.reviewer.username} reviewed {self.reviewed.username} - {self.rating} stars"
+    
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                self.add_to_tutor_rating()
+    
+    def add_to_tutor_rating(self):
+        """Fold this review into the tutor's counters with one UPDATE; the average uses the old values"""
+        from accounts.models import TutorProfile
+        
+        TutorProfile.objects.filter(user_id=self.reviewed_id).update(**{
+            'rating_sum': F('rating_sum') + self.rating,
+            'total_reviews': F('total_reviews') + 1,
+            'updated_at': timezone.now(),
+            f'rating_{self.rating}': F(f'rating_{self.rating}') + 1,
+            'rating': Round(
+                Cast(F('rating_sum') + self.rating, FloatField()) / (F('total_reviews') + 1),
+                2,
+                output_field=DecimalField(max_digits=3, decimal_places=2)
+            ),
+        })
+
+class TutorSearchDocument(models.Model):
+    """Denormalized search text for one tutor, kept in sync by tutoring.signals"""
+    tutor = models.OneToOneField(
+        'accounts.TutorProfile',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    name = models.CharField(max_length=300, blank=True)
+    subjects = models.TextField(blank=True)
+    specializations = models.TextField(blank=True)
+    certifications = models.TextField(blank=True)
+    teaching_philosophy = models.TextField(blank=True)
+    languages_spoken = models.CharField(max_length=200, blank=True)
+    location = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Search document for {self.name}"
+
+
+class SessionReminder(models.Model):
+    """
+    A reminder email queued by the session scheduler.
+
+    Workers claim due reminders by stamping ``claimed_by`` and
+    ``claimed_until`` in a conditional UPDATE, so several nodes can send at
+    once without sending the same reminder twice. A claim that is not
+    completed (the worker died) lapses and the reminder is retried.
+    """
+    session = models.ForeignKey(TutoringSession, on_delete=models.CASCADE, related_name='reminders')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='session_reminders')
+    send_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'recipient'], name='unique_session_reminder'),
+        ]
+        indexes = [
+            models.Index(fields=['sent_at', 'send_at'], name='reminder_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Reminder for {self.recipient.username} about session {self.session_id}"
+
+
+class VolunteerHoursEntry(models.Model):
+    """
+    Append-only ledger of volunteer hours.
+
+    TutorProfile.volunteer_hours_completed and VolunteerHoursMonth are
+    running totals of this table, updated in the same transaction as each
+    entry. Corrections are new entries (negative hours), never edits.
+    """
+    tutor = models.ForeignKey('accounts.TutorProfile', on_delete=models.CASCADE, related_name='volunteer_hours_entries')
+    session = models.OneToOneField(TutoringSession, on_delete=models.SET_NULL, null=True, blank=True, related_name='volunteer_hours_entry')
+    hours = models.DecimalField(max_digits=5, decimal_places=1)
+    month = models.DateField(help_text="First day of the month the hours count towards")
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'Volunteer hours entries'
+        indexes = [
+            models.Index(fields=['tutor', 'month'], name='hours_entry_tutor_month_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.hours}h for {self.tutor} ({self.month:%B %Y})"
+    
+    @classmethod
+    def record(cls, session):
+        """Credit a completed session's hours to its tutor; call inside a transaction"""
+        from accounts.models import TutorProfile
+        
+        tutor_profile = TutorProfile.objects.get(user_id=session.tutor_id)
+        month = timezone.localtime(session.date_time).date().replace(day=1)
+        entry = cls.objects.create(
+            tutor=tutor_profile,
+            session=session,
+            hours=session.duration_hours,
+            month=month
+        )
+        cls.apply(entry)
+        return entry
+    
+    @staticmethod
+    def apply(entry, sessions=1):
+        """Add an entry to the tutor's total and monthly rollup with single-row updates"""
+        from accounts.models import TutorProfile
+        
+        changes = {
+            'volunteer_hours_completed': F('volunteer_hours_completed') + entry.hours,
+            'updated_at': timezone.now(),
+        }
+        if entry.session_id:
+            changes['last_active_at'] = timezone.now()
+        TutorProfile.objects.filter(pk=entry.tutor_id).update(**changes)
+        rollup, _ = VolunteerHoursMonth.objects.get_or_create(tutor_id=entry.tutor_id, month=entry.month)
+        VolunteerHoursMonth.objects.filter(pk=rollup.pk).update(
+            hours=F('hours') + entry.hours,
+            sessions_completed=F('sessions_completed') + sessions
+        )
+
+
+class VolunteerHoursMonth(models.Model):
+    """Per-tutor, per-month totals of the hours ledger"""
+    tutor = models.ForeignKey('accounts.TutorProfile', on_delete=models.CASCADE, related_name='monthly_hours')
+    month = models.DateField()
+    hours = models.DecimalField(max_digits=6, decimal_places=1, default=0)
+    sessions_completed = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(fields=['tutor', 'month'], name='unique_tutor_month_hours'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tutor} - {self.month:%B %Y}: {self.hours}h"
+
+
+class TutorWeeklyLoad(models.Model):
+    """
+    Hours booked with a tutor per ISO week, counting pending, confirmed and
+    completed sessions. Kept by tutoring.capacity in the same transaction
+    as each booking and each status change that frees the time.
+    """
+    tutor = models.ForeignKey('accounts.TutorProfile', on_delete=models.CASCADE, related_name='weekly_loads')
+    week = models.DateField(help_text="Monday of the week")
+    hours = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+    
+    class Meta:
+        ordering = ['week']
+        constraints = [
+            # Also the index for "is this tutor full that week" lookups
+            models.UniqueConstraint(fields=['tutor', 'week'], name='unique_tutor_week_load'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tutor} - week of {self.week:%b %d, %Y}: {self.hours}h"
+
+
+WEEKDAY_CHOICES = [
+    (0, 'Monday'),
+    (1, 'Tuesday'),
+    (2, 'Wednesday'),
+    (3, 'Thursday'),
+    (4, 'Friday'),
+    (5, 'Saturday'),
+    (6, 'Sunday'),
+]
+
+
+class AvailabilitySlot(models.Model):
+    """A weekly window, in local time, when a tutor takes sessions"""
+    tutor = models.ForeignKey('accounts.TutorProfile', on_delete=models.CASCADE, related_name='availability_slots')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    
+    class Meta:
+        ordering = ['weekday', 'start_time']
+        indexes = [
+            # "Who is free on this weekday from start to end" is a range scan on start_time
+            models.Index(fields=['weekday', 'start_time', 'end_time'], name='slot_window_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(start_time__lt=F('end_time')), name='slot_starts_before_end'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tutor} - {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class AvailabilityException(models.Model):
+    """
+    A date on which the weekly slots don't hold: the tutor is away
+    (``is_available=False``) or has extra hours (``is_available=True``).
+    No times means the whole day.
+    """
+    tutor = models.ForeignKey('accounts.TutorProfile', on_delete=models.CASCADE, related_name='availability_exceptions')
+    date = models.DateField()
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    is_available = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['date', 'is_available'], name='exception_date_idx'),
+            models.Index(fields=['tutor', 'date'], name='exception_tutor_date_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(start_time__isnull=True, end_time__isnull=True)
+                    | models.Q(start_time__lt=F('end_time'))
+                ),
+                name='exception_starts_before_end'
+            ),
+        ]
+    
+    def __str__(self):
+        kind = 'available' if self.is_available else 'away'
+        if self.start_time is None:
+            return f"{self.tutor} - {self.date}: {kind} all day"
+        return f"{self.tutor} - {self.date} {self.start_time:%H:%M}-{self.end_time:%H:%M}: {kind}"
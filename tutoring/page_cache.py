@@ -0,0 +1,28 @@
+"""Version names for the cached public tutor pages, and the hooks that bump them"""
+from tutoring_platform.caching import bump_versions
+
+# Bumped by bulk jobs that change many tutors at once
+PUBLIC = 'public'
+TUTORS = 'tutors'
+SUBJECTS = 'subjects'
+
+
+def tutor_page_versions(tutor_id):
+    return [PUBLIC, f'tutor:{tutor_id}']
+
+
+def home_page_versions():
+    return [PUBLIC, TUTORS, SUBJECTS]
+
+
+def invalidate_tutor_pages(*tutor_ids):
+    """The lists that may show these tutors, plus each tutor's own page"""
+    bump_versions(TUTORS, *[f'tutor:{tutor_id}' for tutor_id in tutor_ids])
+
+
+def invalidate_subject_pages():
+    bump_versions(SUBJECTS)
+
+
+def invalidate_public_pages():
+    bump_versions(PUBLIC)
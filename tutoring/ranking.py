@@ -0,0 +1,104 @@
+"""
+The stored ``rank_score`` that orders tutors in search and on the home page.
+
+The score is a weighted sum of signals that are each scaled to 0..1, so it
+can be stored on TutorProfile and served from an index. The signals it
+reads are the rating counters, the review count, volunteer hours, the
+last completed session and how complete the profile is. It is refreshed
+when one of those changes (see tutoring.signals). Recency decays with
+time, so manage.py recompute_rank_scores should also run daily.
+"""
+import math
+
+from django.db.models import Count
+from django.utils import timezone
+
+from accounts.models import TutorProfile
+
+# Bayesian smoothing: every tutor starts with PRIOR_WEIGHT reviews of PRIOR_RATING
+PRIOR_RATING = 3.5
+PRIOR_WEIGHT = 5
+
+# Review counts and hours stop adding to the score at these values
+REVIEWS_CAP = 100
+HOURS_CAP = 200
+# Days for the recency signal to fall to about a third
+RECENCY_DAYS = 30
+
+WEIGHTS = {
+    'rating': 0.45,
+    'reviews': 0.15,
+    'hours': 0.15,
+    'recency': 0.10,
+    'completeness': 0.15,
+}
+
+PROFILE_FIELDS = ('education', 'certifications', 'specializations', 'teaching_philosophy')
+USER_FIELDS = ('bio', 'profile_picture', 'location')
+
+
+def smoothed_rating(tutor_profile):
+    """Average rating pulled towards PRIOR_RATING while there are few reviews"""
+    return (
+        (PRIOR_RATING * PRIOR_WEIGHT + tutor_profile.rating_sum)
+        / (PRIOR_WEIGHT + tutor_profile.total_reviews)
+    )
+
+
+def _log_scale(value, cap):
+    return min(math.log1p(max(value, 0)) / math.log1p(cap), 1.0)
+
+
+def profile_completeness(tutor_profile, subject_count):
+    filled = [bool(getattr(tutor_profile, field)) for field in PROFILE_FIELDS]
+    filled += [bool(getattr(tutor_profile.user, field)) for field in USER_FIELDS]
+    filled.append(subject_count > 0)
+    return sum(filled) / len(filled)
+
+
+def compute_rank_score(tutor_profile, subject_count, now=None):
+    """The score for a profile (with its user loaded) that teaches ``subject_count`` subjects"""
+    now = now or timezone.now()
+    if tutor_profile.last_active_at:
+        idle_days = max((now - tutor_profile.last_active_at).total_seconds() / 86400, 0)
+        recency = math.exp(-idle_days / RECENCY_DAYS)
+    else:
+        recency = 0.0
+    
+    signals = {
+        'rating': smoothed_rating(tutor_profile) / 5,
+        'reviews': _log_scale(tutor_profile.total_reviews, REVIEWS_CAP),
+        'hours': _log_scale(float(tutor_profile.volunteer_hours_completed), HOURS_CAP),
+        'recency': recency,
+        'completeness': profile_completeness(tutor_profile, subject_count),
+    }
+    return round(sum(WEIGHTS[name] * value for name, value in signals.items()), 6)
+
+
+def ranking_queryset():
+    return TutorProfile.objects.select_related('user').annotate(subject_count=Count('subjects'))
+
+
+def refresh_rank_score(tutor_profile_id):
+    """Recompute one tutor's score; a single-column UPDATE, so no save signals fire"""
+    tutor_profile = ranking_queryset().filter(pk=tutor_profile_id).first()
+    if tutor_profile is None:
+        return
+    TutorProfile.objects.filter(pk=tutor_profile_id).update(
+        rank_score=compute_rank_score(tutor_profile, tutor_profile.subject_count)
+    )
+
+
+def recompute_rank_scores(batch_size=500):
+    """Recompute every tutor's score, writing only the ones that changed"""
+    now = timezone.now()
+    changed = []
+    total = 0
+    for tutor_profile in ranking_queryset().order_by('pk').iterator(chunk_size=batch_size):
+        score = compute_rank_score(tutor_profile, tutor_profile.subject_count, now)
+        if score != tutor_profile.rank_score:
+            tutor_profile.rank_score = score
+            changed.append(tutor_profile)
+        total += 1
+    TutorProfile.objects.bulk_update(changed, ['rank_score'], batch_size=batch_size)
+    return total, len(changed)
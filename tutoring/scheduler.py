@@ -0,0 +1,141 @@
+"""
+Time-based session state, kept out of request handling.
+
+The run_session_scheduler command calls run_once() on an interval. Each
+step is a set-based UPDATE or INSERT that is safe to repeat, and reminders
+are claimed with a conditional UPDATE before they are sent, so the
+scheduler can run on several nodes at once.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.core.mail import send_mail
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .models import SessionReminder, TutoringSession
+from .transitions import apply_transition_to_all
+
+logger = logging.getLogger(__name__)
+
+REMINDER_LEAD = timedelta(hours=24)
+CLAIM_TIMEOUT = timedelta(minutes=5)
+CLAIM_BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+
+
+def expire_pending_sessions(now):
+    """Pending bookings nobody accepted before they were due to start"""
+    return apply_transition_to_all(TutoringSession.objects.filter(date_time__lte=now), 'expire', now=now)
+
+
+def flag_awaiting_completion(now):
+    """Confirmed sessions that have ended and can now be marked complete"""
+    return TutoringSession.objects.filter(
+        status='confirmed',
+        awaiting_completion=False,
+        end_time__lte=now
+    ).update(awaiting_completion=True, updated_at=now)
+
+
+def queue_reminders(now):
+    """Queue a reminder for both people in each confirmed session starting within REMINDER_LEAD"""
+    upcoming = TutoringSession.objects.filter(
+        status='confirmed',
+        date_time__gt=now,
+        date_time__lte=now + REMINDER_LEAD
+    ).exclude(
+        Exists(SessionReminder.objects.filter(session=OuterRef('pk')))
+    ).values_list('id', 'student_id', 'tutor_id', 'date_time')
+    
+    reminders = []
+    for session_id, student_id, tutor_id, date_time in upcoming:
+        for recipient_id in (student_id, tutor_id):
+            reminders.append(SessionReminder(
+                session_id=session_id,
+                recipient_id=recipient_id,
+                send_at=date_time - REMINDER_LEAD,
+            ))
+    # Another node may have queued the same reminders since the query above
+    SessionReminder.objects.bulk_create(reminders, ignore_conflicts=True)
+    return len(reminders)
+
+
+def claim_reminders(now, limit=CLAIM_BATCH_SIZE):
+    """
+    Claim up to ``limit`` due reminders for this worker and return them.
+
+    The UPDATE repeats the availability check, so when two workers pick
+    the same rows only the first UPDATE to reach each row takes it.
+    """
+    unclaimed = Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+    due = SessionReminder.objects.filter(
+        unclaimed,
+        sent_at__isnull=True,
+        send_at__lte=now,
+        attempts__lt=MAX_ATTEMPTS
+    )
+    ids = list(due.order_by('send_at').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    
+    token = uuid.uuid4().hex
+    due.filter(id__in=ids).update(
+        claimed_by=token,
+        claimed_until=now + CLAIM_TIMEOUT,
+        attempts=F('attempts') + 1
+    )
+    return list(
+        SessionReminder.objects.filter(
+            claimed_by=token,
+            sent_at__isnull=True
+        ).select_related('session__student', 'session__tutor', 'session__subject', 'recipient')
+    )
+
+
+def send_reminder(reminder):
+    session = reminder.session
+    other = session.tutor if reminder.recipient_id == session.student_id else session.student
+    start = timezone.localtime(session.date_time).strftime('%B %d, %Y at %I:%M %p')
+    send_mail(
+        subject=f'Reminder: {session.subject.name} session on {start}',
+        message=(
+            f'Hi {reminder.recipient.first_name or reminder.recipient.username},\n\n'
+            f'This is a reminder of your {session.subject.name} session with '
+            f'{other.get_full_name() or other.username} on {start} '
+            f'({session.duration_hours} hours).\n'
+        ),
+        from_email=None,
+        recipient_list=[reminder.recipient.email],
+    )
+
+
+def send_due_reminders(now):
+    sent = 0
+    for reminder in claim_reminders(now):
+        # Sessions cancelled after the reminder was queued are skipped
+        if reminder.session.status == 'confirmed' and reminder.recipient.email:
+            try:
+                send_reminder(reminder)
+            except Exception:
+                # The claim lapses and another run retries, up to MAX_ATTEMPTS
+                logger.exception('Could not send reminder %s', reminder.id)
+                continue
+            sent += 1
+        SessionReminder.objects.filter(
+            id=reminder.id,
+            claimed_by=reminder.claimed_by
+        ).update(sent_at=timezone.now())
+    return sent
+
+
+def run_once(now=None):
+    """Run every scheduler step once and return how many rows each touched"""
+    now = now or timezone.now()
+    return {
+        'expired': expire_pending_sessions(now),
+        'awaiting_completion': flag_awaiting_completion(now),
+        'reminders_queued': queue_reminders(now),
+        'reminders_sent': send_due_reminders(now),
+    }
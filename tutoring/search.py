@@ -0,0 +1,124 @@
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from tutoring_platform.fulltext import fts5_match, pg_tsquery, search_terms, vendor
+from .models import TutorSearchDocument
+
+# bm25 column weights, in FTS5 column order
+SQLITE_WEIGHTS = '10.0, 8.0, 4.0, 2.0, 1.0, 2.0, 3.0'
+DOCUMENT_FIELDS = (
+    'name', 'subjects', 'specializations', 'certifications',
+    'teaching_philosophy', 'languages_spoken', 'location',
+)
+
+
+def build_search_document(tutor_profile):
+    """Collect the searchable text for a tutor from the profile, user and subjects"""
+    user = tutor_profile.user
+    return {
+        'name': f"{user.first_name} {user.last_name} {user.username}".strip(),
+        'subjects': ' '.join(tutor_profile.subjects.values_list('name', flat=True)),
+        'specializations': tutor_profile.specializations,
+        'certifications': tutor_profile.certifications,
+        'teaching_philosophy': tutor_profile.teaching_philosophy,
+        'languages_spoken': tutor_profile.languages_spoken,
+        'location': user.location,
+    }
+
+
+def update_search_document(tutor_profile):
+    """Write the tutor's search document; the database keeps the full-text index in step"""
+    TutorSearchDocument.objects.update_or_create(
+        tutor=tutor_profile,
+        defaults=build_search_document(tutor_profile)
+    )
+
+
+def search_tutors(tutors, text='', location=''):
+    """
+    Restrict a TutorProfile queryset to full-text matches.
+
+    Matching tutors are annotated with ``search_rank`` (higher is better)
+    and ordered best first. The queryset is returned unchanged when there is nothing to search for.
+    """
+    terms = search_terms(text)
+    location_terms = search_terms(location)
+    if not terms and not location_terms:
+        return tutors
+
+    backend = vendor()
+    if backend == 'sqlite':
+        tutors = _search_sqlite(tutors, terms, location_terms)
+    elif backend == 'postgresql':
+        tutors = _search_postgres(tutors, terms, location_terms)
+    else:
+        tutors = _search_fallback(tutors, terms, location_terms)
+    return tutors.order_by('-search_rank', 'id')
+
+
+def _search_sqlite(tutors, terms, location_terms):
+    clauses = []
+    if terms:
+        clauses.append(fts5_match(terms))
+    if location_terms:
+        clauses.append(f'location : ({fts5_match(location_terms)})')
+    match = ' AND '.join(clauses)
+
+    return tutors.filter(
+        id__in=RawSQL(
+            'SELECT rowid FROM tutoring_tutorsearch_fts WHERE tutoring_tutorsearch_fts MATCH %s',
+            [match]
+        )
+    ).annotate(
+        # bm25() is negative with the best match lowest, so flip it
+        search_rank=RawSQL(
+            f'SELECT -bm25(tutoring_tutorsearch_fts, {SQLITE_WEIGHTS}) FROM tutoring_tutorsearch_fts '
+            'WHERE tutoring_tutorsearch_fts MATCH %s AND rowid = accounts_tutorprofile.id',
+            [match],
+            output_field=FloatField()
+        )
+    )
+
+
+def _search_postgres(tutors, terms, location_terms):
+    conditions = []
+    params = []
+    if terms:
+        conditions.append("search_vector @@ to_tsquery('english', %s)")
+        params.append(pg_tsquery(terms))
+    if location_terms:
+        conditions.append("location_vector @@ to_tsquery('simple', %s)")
+        params.append(pg_tsquery(location_terms))
+
+    if terms:
+        rank_sql = "ts_rank(search_vector, to_tsquery('english', %s))"
+        rank_params = [pg_tsquery(terms)]
+    else:
+        rank_sql = "ts_rank(location_vector, to_tsquery('simple', %s))"
+        rank_params = [pg_tsquery(location_terms)]
+
+    return tutors.filter(
+        id__in=RawSQL(
+            f"SELECT tutor_id FROM tutoring_tutorsearchdocument WHERE {' AND '.join(conditions)}",
+            params
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'SELECT {rank_sql} FROM tutoring_tutorsearchdocument '
+            'WHERE tutor_id = accounts_tutorprofile.id',
+            rank_params,
+            output_field=FloatField()
+        )
+    )
+
+
+def _search_fallback(tutors, terms, location_terms):
+    """Unindexed LIKE matching for databases without a full-text index"""
+    for term in terms:
+        term_filter = Q()
+        for field in DOCUMENT_FIELDS:
+            term_filter |= Q(**{f'search_document__{field}__icontains': term})
+        tutors = tutors.filter(term_filter)
+    for term in location_terms:
+        tutors = tutors.filter(search_document__location__icontains=term)
+    return tutors.annotate(search_rank=Value(0.0, output_field=FloatField()))
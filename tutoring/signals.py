@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import TutorProfile, User
+from .models import AvailabilitySlot, Review, Subject, TutoringSession, VolunteerHoursEntry
+from .page_cache import invalidate_subject_pages, invalidate_tutor_pages
+from .ranking import refresh_rank_score
+from .search import update_search_document
+from .summary import invalidate_dashboard_summary
+
+
+def tutor_changed(tutor_profile_id, touch=False):
+    """
+    Refresh what is derived from a tutor: the rank score and cached pages.
+
+    Pass ``touch`` when the change is stored outside TutorProfile (user,
+    subjects); tutor card fragments are keyed by the profile's updated_at.
+    """
+    if touch:
+        TutorProfile.objects.filter(pk=tutor_profile_id).update(updated_at=timezone.now())
+    
+    def refresh():
+        refresh_rank_score(tutor_profile_id)
+        invalidate_tutor_pages(tutor_profile_id)
+    # After commit, so counters updated later in the same transaction are included
+    transaction.on_commit(refresh)
+
+
+@receiver(post_save, sender=TutorProfile)
+def refresh_search_document_for_profile(sender, instance, **kwargs):
+    update_search_document(instance)
+    tutor_changed(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def refresh_search_document_for_user(sender, instance, **kwargs):
+    """Names and location live on the user, so tutors need re-indexing when it changes"""
+    if kwargs.get('raw') or instance.user_type != 'tutor':
+        return
+    if kwargs.get('update_fields') == frozenset({'last_login'}):
+        return
+    tutor_profile = TutorProfile.objects.filter(user=instance).first()
+    if tutor_profile:
+        update_search_document(tutor_profile)
+        tutor_changed(tutor_profile.pk, touch=True)
+
+
+@receiver(m2m_changed, sender=TutorProfile.subjects.through)
+def refresh_search_document_for_subjects(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # subject.tutorprofile_set.clear() reports no pk_set afterwards
+        instance._cleared_tutor_pks = list(instance.tutorprofile_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_search_document(instance)
+        tutor_changed(instance.pk, touch=True)
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_tutor_pks', [])
+    for tutor_profile in TutorProfile.objects.filter(pk__in=pk_set).select_related('user'):
+        update_search_document(tutor_profile)
+        tutor_changed(tutor_profile.pk, touch=True)
+
+
+@receiver(post_save, sender=Subject)
+def refresh_search_documents_for_subject(sender, instance, created, **kwargs):
+    """A renamed subject changes the text of every tutor who teaches it"""
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(invalidate_subject_pages)
+    if created:
+        return
+    for tutor_profile in TutorProfile.objects.filter(subjects=instance).select_related('user'):
+        update_search_document(tutor_profile)
+        tutor_changed(tutor_profile.pk, touch=True)
+
+
+@receiver(post_delete, sender=Subject)
+def invalidate_pages_for_subject(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_subject_pages)
+
+
+@receiver(post_save, sender=Review)
+def refresh_rank_for_review(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        tutor_profile_id = TutorProfile.objects.filter(user_id=instance.reviewed_id).values_list('pk', flat=True).first()
+        if tutor_profile_id:
+            tutor_changed(tutor_profile_id)
+
+
+@receiver(post_save, sender=VolunteerHoursEntry)
+def refresh_rank_for_hours(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        tutor_changed(instance.tutor_id)
+
+
+@receiver(post_save, sender=TutoringSession)
+@receiver(post_delete, sender=TutoringSession)
+def invalidate_summary_for_session(sender, instance, **kwargs):
+    invalidate_dashboard_summary(instance.student_id, instance.tutor_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_summary_for_review(sender, instance, **kwargs):
+    invalidate_dashboard_summary(instance.reviewer_id, instance.reviewed_id)
+
+
+@receiver(post_save, sender=AvailabilitySlot)
+@receiver(post_delete, sender=AvailabilitySlot)
+def refresh_pages_for_availability(sender, instance, **kwargs):
+    """Tutor pages list the weekly slots"""
+    if not kwargs.get('raw'):
+        tutor_changed(instance.tutor_id, touch=True)
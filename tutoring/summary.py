@@ -0,0 +1,77 @@
+"""
+Per-user dashboard summary, built with one aggregate and kept in the cache.
+
+tutoring.signals drops a user's summary when one of their sessions or
+reviews is saved or deleted. Code that changes sessions with
+QuerySet.update() bypasses those signals and must call
+invalidate_dashboard_summary() itself.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+from .models import TutoringSession
+
+SUMMARY_TIMEOUT = 60 * 60
+
+
+def summary_cache_key(user_id):
+    return f'dashboard-summary:{user_id}'
+
+
+def _month_bounds(now):
+    start = timezone.localtime(now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def build_dashboard_summary(user, now=None):
+    now = now or timezone.now()
+    month_start, month_end = _month_bounds(now)
+    this_month = Q(date_time__gte=month_start, date_time__lt=month_end)
+    upcoming = Q(status='confirmed', date_time__gte=now)
+    role = 'tutor' if user.user_type == 'tutor' else 'student'
+    
+    summary = TutoringSession.objects.filter(**{role: user}).aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        confirmed=Count('id', filter=Q(status='confirmed')),
+        completed=Count('id', filter=Q(status='completed')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+        expired=Count('id', filter=Q(status='expired')),
+        upcoming=Count('id', filter=upcoming),
+        next_session_at=Min('date_time', filter=upcoming),
+        this_month=Count('id', filter=this_month),
+        hours_this_month=Sum('duration_hours', filter=this_month & Q(status='completed')),
+        students=Count('student', distinct=True),
+        awaiting_review=Count('id', filter=Q(status='completed', review__isnull=True)),
+    )
+    summary['hours_this_month'] = summary['hours_this_month'] or 0
+    return summary
+
+
+def get_dashboard_summary(user):
+    key = summary_cache_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        now = timezone.now()
+        summary = build_dashboard_summary(user, now)
+        # "Upcoming" and "this month" move with the clock, so expire when they next change
+        timeout = SUMMARY_TIMEOUT
+        boundaries = [_month_bounds(now)[1]]
+        if summary['next_session_at']:
+            boundaries.append(summary['next_session_at'])
+        for boundary in boundaries:
+            timeout = min(timeout, max(int((boundary - now).total_seconds()) + 1, 1))
+        cache.set(key, summary, timeout)
+    return summary
+
+
+def invalidate_dashboard_summary(*user_ids):
+    """Drop the users' cached summaries once the current transaction commits"""
+    keys = [summary_cache_key(user_id) for user_id in set(user_ids) if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,14 @@
+from django import template
+
+from tutoring.transitions import can_transition
+
+register = template.Library()
+
+
+@register.filter
+def allows(session, action):
+    """
+    Whether ``session``'s status lets ``action`` apply, from the same state
+    graph the views use, e.g. ``{% if session|allows:'accept' %}``.
+    """
+    return can_transition(session, action)
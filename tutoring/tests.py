@@ -1,3 +1,750 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from accounts.models import TutorProfile, User
+from .availability import BOOKING_DAYS
+from .booking import MAX_OCCURRENCES, BookingConflict, book_series, book_session, series_starts
+from .capacity import week_of, weeks_between
+from .ranking import compute_rank_score, ranking_queryset
+from .forms import BookingForm
+from .models import (
+    AvailabilityException, AvailabilitySlot, Review, SessionEvent, SessionReminder, SessionSeries, Subject, TutoringSession,
+    TutorWeeklyLoad, VolunteerHoursEntry, VolunteerHoursMonth
+)
+from .scheduler import CLAIM_TIMEOUT, claim_reminders, expire_pending_sessions, queue_reminders, run_once
+from .search import search_tutors
+from .summary import get_dashboard_summary
+from .transitions import apply_transition, apply_transition_to_all
+from tutoring_platform.pagination import encode_cursor
+
+
+def next_monday(hour=10):
+    """An aware local datetime on next week's Monday, clear of the booking lead time"""
+    today = timezone.localtime()
+    monday = today + timedelta(days=7 - today.weekday())
+    return monday.replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+def make_tutor(username, **profile_fields):
+    user = User.objects.create_user(username, password='x', user_type='tutor', first_name=username.title())
+    profile, _ = TutorProfile.objects.get_or_create(user=user)
+    profile_fields.setdefault('is_verified', True)
+    for field, value in profile_fields.items():
+        setattr(profile, field, value)
+    profile.save()
+    return profile
+
+
+class BookingTestCase(TestCase):
+    """A tutor teaching Chemistry, a student, and a bookable start time next Monday"""
+    commitment_level = 'regular'
+
+    def setUp(self):
+        self.tutor = make_tutor('tutor', commitment_level=self.commitment_level)
+        self.subject = Subject.objects.create(name='Chemistry')
+        self.tutor.subjects.add(self.subject)
+        self.student = User.objects.create_user('student', password='x', user_type='student')
+        self.start = next_monday()
+
+
+class TutorSearchTests(TestCase):
+    def setUp(self):
+        self.chemistry = Subject.objects.create(name='Chemistry')
+        self.teaches = make_tutor('teaches')
+        self.teaches.subjects.add(self.chemistry)
+        self.mentions = make_tutor('mentions', teaching_philosophy='I once studied chemistry myself.')
+        self.other = make_tutor('other', specializations='Poetry')
+
+    def search(self, text='', location=''):
+        return list(search_tutors(TutorProfile.objects.all(), text, location))
+
+    def test_prefix_match_ranks_subjects_over_philosophy(self):
+        self.assertEqual(self.search('chem'), [self.teaches, self.mentions])
+
+    def test_index_follows_profile_user_and_subject_changes(self):
+        self.other.specializations = 'Organic synthesis'
+        self.other.save()
+        self.assertEqual(self.search('poetry'), [])
+        self.assertEqual(self.search('organic'), [self.other])
+
+        self.chemistry.name = 'Biochemistry'
+        self.chemistry.save()
+        self.assertEqual(self.search('biochem'), [self.teaches])
+
+        self.mentions.user.location = 'Burnaby, BC'
+        self.mentions.user.save()
+        self.assertEqual(self.search(location='burnaby'), [self.mentions])
+        self.assertEqual(self.search('chem', location='burnaby'), [self.mentions])
+
+        self.mentions.user.delete()
+        self.assertEqual(self.search(location='burnaby'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        for text in ('"chem', 'chem OR poetry', 'chem*) NEAR(', 'subjects:chem'):
+            with self.subTest(text=text):
+                response = self.client.get(reverse('tutor_search'), {'q': text})
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search('chem OR poetry'), [])
+
+
+class DashboardSummaryTests(BookingTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.session = book_session(self.student, self.tutor, self.subject, self.start, '1.0')
+
+    def summaries(self):
+        return get_dashboard_summary(self.student), get_dashboard_summary(self.tutor.user)
+
+    def test_summary_is_served_from_cache(self):
+        self.summaries()
+        with self.assertNumQueries(0):
+            student, tutor = self.summaries()
+        self.assertEqual((student['pending'], tutor['pending']), (1, 1))
+
+    def test_saving_a_session_refreshes_both_people(self):
+        self.summaries()
+        with self.captureOnCommitCallbacks(execute=True):
+            book_session(self.student, self.tutor, self.subject, self.start + timedelta(days=1), '1.0')
+        student, tutor = self.summaries()
+        self.assertEqual((student['pending'], tutor['pending']), (2, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.delete()
+        student, tutor = self.summaries()
+        self.assertEqual((student['total'], tutor['total']), (1, 1))
+
+    def test_transitions_refresh_summaries(self):
+        self.summaries()
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_transition(self.session, 'accept', self.tutor.user)
+        student, tutor = self.summaries()
+        self.assertEqual((student['confirmed'], tutor['upcoming']), (1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_transition_to_all(TutoringSession.objects.all(), 'cancel', self.student)
+        student, tutor = self.summaries()
+        self.assertEqual((student['cancelled'], tutor['confirmed']), (1, 0))
+
+    def test_review_refreshes_awaiting_review(self):
+        TutoringSession.objects.filter(pk=self.session.pk).update(status='completed')
+        cache.clear()
+        self.assertEqual(get_dashboard_summary(self.student)['awaiting_review'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(session=self.session, reviewer=self.student, reviewed=self.tutor.user, rating=5)
+        self.assertEqual(get_dashboard_summary(self.student)['awaiting_review'], 0)
+
+
+class TutorSearchPaginationTests(TestCase):
+    def setUp(self):
+        self.tutors = [make_tutor(f'tutor{i}') for i in range(3)]
+
+    def test_forged_cursor_falls_back_to_first_page(self):
+        for values in (['1.0', 'zz'], [1.5, [1]], [{'a': 1}, 2]):
+            with self.subTest(values=values):
+                response = self.client.get(reverse('tutor_search'), {'cursor': encode_cursor(values)})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['tutors']), 3)
+
+    def test_result_count_covers_every_page(self):
+        response = self.client.get(reverse('tutor_search'))
+        self.assertEqual(response.context['total_tutors'], 3)
+
+
+class RankScoreTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user('student', password='x', user_type='student')
+        self.subject = Subject.objects.create(name='Chemistry')
+        self.days_ago = 0
+
+    def review(self, tutor, *ratings):
+        for rating in ratings:
+            self.days_ago += 1
+            session = TutoringSession.objects.create(
+                student=self.student,
+                tutor=tutor.user,
+                subject=self.subject,
+                date_time=timezone.now() - timedelta(days=self.days_ago),
+                status='completed'
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                Review.objects.create(session=session, reviewer=self.student, reviewed=tutor.user, rating=rating)
+
+    def ranked(self):
+        return list(self.client.get(reverse('tutor_search')).context['tutors'])
+
+    def test_many_good_reviews_outrank_one_perfect_review(self):
+        # Created best first, so the newest-first tie-break alone would reverse them
+        steady, lucky, unreviewed = make_tutor('steady'), make_tutor('lucky'), make_tutor('unreviewed')
+        self.review(lucky, 5)
+        self.review(steady, *[5, 4] * 10)
+
+        self.assertEqual(self.ranked(), [steady, lucky, unreviewed])
+
+    def test_recompute_repairs_stale_scores(self):
+        reviewed, other = make_tutor('reviewed'), make_tutor('other')
+        self.review(reviewed, 5, 5)
+        TutorProfile.objects.update(rank_score=0)
+        TutorProfile.objects.filter(pk=other.pk).update(rank_score=1)
+        self.assertEqual(self.ranked(), [other, reviewed])
+
+        call_command('recompute_rank_scores', stdout=StringIO())
+
+        self.assertEqual(self.ranked(), [reviewed, other])
+        for tutor in ranking_queryset():
+            self.assertAlmostEqual(tutor.rank_score, compute_rank_score(tutor, tutor.subject_count), places=3)
+
+
+class ReconcileRatingsTests(TestCase):
+    def setUp(self):
+        self.tutor = make_tutor('tutor')
+        student = User.objects.create_user('student', password='x', user_type='student')
+        subject = Subject.objects.create(name='Chemistry')
+        for rating in (5, 4):
+            session = TutoringSession.objects.create(
+                student=student,
+                tutor=self.tutor.user,
+                subject=subject,
+                date_time=timezone.now() - timedelta(days=rating),
+                status='completed'
+            )
+            Review.objects.create(session=session, reviewer=student, reviewed=self.tutor.user, rating=rating)
+
+    def test_restores_counters_and_rank_score(self):
+        TutorProfile.objects.filter(pk=self.tutor.pk).update(
+            total_reviews=0, rating_sum=0, rating=0, rating_4=0, rating_5=0, rank_score=0
+        )
+
+        call_command('reconcile_ratings', stdout=StringIO())
+
+        tutor = ranking_queryset().get(pk=self.tutor.pk)
+        self.assertEqual(
+            (tutor.total_reviews, tutor.rating_sum, tutor.rating, tutor.rating_4, tutor.rating_5),
+            (2, 9, Decimal('4.50'), 1, 1)
+        )
+        self.assertEqual(tutor.rank_score, compute_rank_score(tutor, tutor.subject_count, tutor.updated_at))
+        self.assertGreater(tutor.rank_score, 0)
+
+
+class ConditionalSessionPageTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = book_session(self.student, self.tutor, self.subject, self.start, '1.0')
+        self.client.force_login(self.student)
+        self.url = reverse('session_detail', args=[self.session.id])
+
+    def get(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def test_revalidates_with_etag_only(self):
+        first = self.get()
+        self.assertNotIn('Last-Modified', first)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+    def test_renamed_subject_is_not_a_304(self):
+        first = self.get()
+        Subject.objects.filter(pk=self.subject.pk).update(name='Organic Chemistry')
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=http_date()).status_code, 200)
+
+
+class AvailabilityTests(BookingTestCase):
+    commitment_level = 'intensive'
+
+    def setUp(self):
+        super().setUp()
+        self.monday = next_monday(hour=9)
+        AvailabilitySlot.objects.create(tutor=self.tutor, weekday=0, start_time=time(9), end_time=time(12))
+
+    def search(self, **params):
+        response = self.client.get(reverse('tutor_search'), {'available_from': '10:00', 'available_until': '11:00', **params})
+        return set(response.context['tutors'])
+
+    def book(self, start, duration='1.0'):
+        self.client.force_login(self.student)
+        return self.client.post(reverse('book_session', args=[self.tutor.id]), {
+            'subject': self.subject.id,
+            'duration_hours': duration,
+            'slot': start.isoformat(),
+        })
+
+    def test_date_search_applies_exceptions(self):
+        away = make_tutor('away')
+        AvailabilitySlot.objects.create(tutor=away, weekday=0, start_time=time(9), end_time=time(12))
+        AvailabilityException.objects.create(tutor=away, date=self.monday.date())
+        extra = make_tutor('extra')
+        AvailabilityException.objects.create(
+            tutor=extra, date=self.monday.date(), start_time=time(10), end_time=time(11), is_available=True
+        )
+
+        self.assertEqual(self.search(weekday=0), {self.tutor, away})
+        self.assertEqual(self.search(available_date=self.monday.date().isoformat()), {self.tutor, extra})
+
+    def test_books_open_slot(self):
+        response = self.book(self.monday)
+        self.assertRedirects(response, reverse('dashboard'))
+        self.assertEqual(TutoringSession.objects.get().date_time, self.monday)
+
+    def test_away_exception_closes_slot(self):
+        AvailabilityException.objects.create(
+            tutor=self.tutor, date=self.monday.date(), start_time=time(9, 30), end_time=time(10, 30)
+        )
+        response = self.book(self.monday)
+        self.assertIn('slot', response.context['form'].errors)
+        self.assertFalse(TutoringSession.objects.exists())
+
+    def test_extra_hours_exception_opens_time(self):
+        tuesday = self.monday + timedelta(days=1, hours=5)
+        AvailabilityException.objects.create(
+            tutor=self.tutor, date=tuesday.date(), start_time=time(14), end_time=time(16), is_available=True
+        )
+        self.assertRedirects(self.book(tuesday), reverse('dashboard'))
+
+    def test_booked_session_closes_overlapping_time(self):
+        other_student = User.objects.create_user('otherstudent', password='x', user_type='student')
+        book_session(other_student, self.tutor, self.subject, self.monday + timedelta(hours=1), '1.0')
+
+        # 9:00 is still offered for a one hour session, but not for a longer one
+        response = self.book(self.monday, duration='1.5')
+        self.assertEqual(
+            response.context['form'].non_field_errors(),
+            ['That time is no longer open for this length of session. Please pick another.']
+        )
+        self.assertEqual(TutoringSession.objects.count(), 1)
+
+
+class CompletionStatusTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.tutor.user)
+
+    def add_session(self, start, status='confirmed', tutor=None):
+        return TutoringSession.objects.create(
+            student=self.student,
+            tutor=(tutor or self.tutor).user,
+            subject=self.subject,
+            date_time=start,
+            duration_hours=Decimal('1.0'),
+            status=status
+        )
+
+    def get_status(self):
+        return self.client.get(reverse('completion_status')).json()
+
+    def test_reports_every_confirmed_session_at_once(self):
+        now = timezone.now()
+        finished = self.add_session(now - timedelta(hours=2))
+        upcoming = self.add_session(now + timedelta(hours=3))
+        later = self.add_session(now + timedelta(days=1))
+        self.add_session(now - timedelta(hours=2), status='pending')
+        self.add_session(now - timedelta(hours=2), tutor=make_tutor('othertutor'))
+
+        data = self.get_status()
+
+        self.assertEqual(set(data['sessions']), {str(finished.id), str(upcoming.id), str(later.id)})
+        self.assertTrue(data['sessions'][str(finished.id)]['can_complete'])
+        self.assertFalse(data['sessions'][str(upcoming.id)]['can_complete'])
+        self.assertEqual(datetime.fromisoformat(data['next_change_at']), upcoming.end_time)
+
+    def test_query_count_does_not_grow_with_sessions(self):
+        self.add_session(timezone.now() + timedelta(hours=3))
+        with CaptureQueriesContext(connection) as few:
+            self.get_status()
+        for days in range(1, 10):
+            self.add_session(timezone.now() + timedelta(days=days))
+        with CaptureQueriesContext(connection) as many:
+            self.get_status()
+        self.assertEqual(len(few), len(many))
+
+
+class SessionSchedulerTests(TestCase):
+    def setUp(self):
+        tutor = make_tutor('tutor')
+        tutor.user.email = 'tutor@example.com'
+        tutor.user.save()
+        student = User.objects.create_user('student', email='student@example.com', password='x', user_type='student')
+        self.now = timezone.now()
+        self.session = TutoringSession.objects.create(
+            student=student,
+            tutor=tutor.user,
+            subject=Subject.objects.create(name='Chemistry'),
+            date_time=self.now + timedelta(hours=3),
+            status='confirmed'
+        )
+
+    def test_reminders_are_queued_once(self):
+        self.assertEqual(queue_reminders(self.now), 2)
+        self.assertEqual(queue_reminders(self.now), 0)
+        self.assertEqual(SessionReminder.objects.count(), 2)
+
+    def test_claimed_reminders_are_not_claimed_again_until_the_claim_lapses(self):
+        queue_reminders(self.now)
+        self.assertEqual(len(claim_reminders(self.now)), 2)
+        self.assertEqual(claim_reminders(self.now), [])
+
+        retried = claim_reminders(self.now + CLAIM_TIMEOUT + timedelta(seconds=1))
+        self.assertEqual(len(retried), 2)
+        self.assertEqual({reminder.attempts for reminder in retried}, {2})
+
+    def test_each_reminder_is_sent_once(self):
+        run_once(self.now)
+        run_once(self.now + timedelta(minutes=1))
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), ['student@example.com', 'tutor@example.com'])
+        self.assertFalse(SessionReminder.objects.filter(sent_at__isnull=True).exists())
+
+    def test_cancelled_session_gets_no_reminder(self):
+        queue_reminders(self.now)
+        apply_transition(self.session, 'cancel')
+        self.assertEqual(run_once(self.now)['reminders_sent'], 0)
+        self.assertEqual(mail.outbox, [])
+
+    def test_ended_sessions_await_completion(self):
+        end = self.session.end_time
+        self.assertEqual(run_once(end - timedelta(seconds=1))['awaiting_completion'], 0)
+        self.assertEqual(run_once(end)['awaiting_completion'], 1)
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.awaiting_completion)
+
+
+class VolunteerHoursLedgerTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.last_year = timezone.localtime(timezone.now() - timedelta(days=400)).replace(hour=9, minute=0)
+        self.recent = timezone.now() - timedelta(days=2)
+        for start, hours in ((self.last_year, '1.5'), (self.last_year + timedelta(hours=2), '2.0'), (self.recent, '1.0')):
+            TutoringSession.objects.create(
+                student=self.student,
+                tutor=self.tutor.user,
+                subject=self.subject,
+                date_time=start,
+                duration_hours=Decimal(hours),
+                status='confirmed'
+            ).mark_as_completed(self.tutor.user)
+
+    def months(self):
+        return set(VolunteerHoursMonth.objects.filter(tutor=self.tutor).values_list('month', 'hours', 'sessions_completed'))
+
+    def total(self):
+        self.tutor.refresh_from_db()
+        return self.tutor.volunteer_hours_completed
+
+    def month_of(self, date_time):
+        return timezone.localtime(date_time).date().replace(day=1)
+
+    def test_completions_add_to_total_and_month(self):
+        self.assertEqual(self.total(), Decimal('4.5'))
+        self.assertEqual(VolunteerHoursEntry.objects.filter(tutor=self.tutor).count(), 3)
+        self.assertEqual(self.months(), {
+            (self.month_of(self.last_year), Decimal('3.5'), 2),
+            (self.month_of(self.recent), Decimal('1.0'), 1),
+        })
+
+    def test_correction_is_a_new_entry(self):
+        correction = VolunteerHoursEntry.objects.create(
+            tutor=self.tutor, hours=Decimal('-0.5'), month=self.month_of(self.recent), note='Left early'
+        )
+        VolunteerHoursEntry.apply(correction, sessions=0)
+
+        self.assertEqual(self.total(), Decimal('4.0'))
+        self.assertIn((self.month_of(self.recent), Decimal('0.5'), 1), self.months())
+
+    def test_rebuild_matches_incremental_totals(self):
+        incremental = (self.total(), self.months())
+        TutorProfile.objects.filter(pk=self.tutor.pk).update(volunteer_hours_completed=Decimal('99'))
+        VolunteerHoursMonth.objects.update(hours=Decimal('0'), sessions_completed=0)
+
+        call_command('rebuild_volunteer_hours', stdout=StringIO())
+
+        self.assertEqual((self.total(), self.months()), incremental)
+
+
+class BookingConflictTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_tutor = make_tutor('othertutor')
+        self.other_student = User.objects.create_user('otherstudent', password='x', user_type='student')
+        self.booked = book_session(self.student, self.tutor, self.subject, self.start, '1.0')
+
+    def test_tutor_overlap_rejected(self):
+        with self.assertRaisesMessage(BookingConflict, 'This tutor already has a session'):
+            book_session(self.other_student, self.tutor, self.subject, self.start + timedelta(minutes=30), '1.0')
+
+    def test_student_overlap_rejected(self):
+        with self.assertRaisesMessage(BookingConflict, 'You already have a session'):
+            book_session(self.student, self.other_tutor, self.subject, self.start - timedelta(minutes=30), '1.0')
+
+    def test_touching_intervals_allowed(self):
+        book_session(self.other_student, self.tutor, self.subject, self.start + timedelta(hours=1), '1.0')
+        book_session(self.student, self.other_tutor, self.subject, self.start - timedelta(hours=1), '1.0')
+        self.assertEqual(TutoringSession.objects.count(), 3)
+
+    def test_cancelled_and_expired_sessions_do_not_block(self):
+        for status in ('cancelled', 'expired'):
+            with self.subTest(status=status):
+                TutoringSession.objects.filter(status__in=['pending', 'confirmed']).update(status=status)
+                book_session(self.other_student, self.tutor, self.subject, self.start, '1.0')
+
+    def test_conflict_shown_as_form_error(self):
+        self.client.force_login(self.other_student)
+        local = timezone.localtime(self.start + timedelta(minutes=30))
+        response = self.client.post(reverse('book_session', args=[self.tutor.id]), {
+            'subject': self.subject.id,
+            'duration_hours': '1.0',
+            'preferred_date': local.date().isoformat(),
+            'preferred_time': local.strftime('%H:%M'),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['form'].non_field_errors(),
+            ['This tutor already has a session at that time. Please pick another time.']
+        )
+        self.assertEqual(TutoringSession.objects.count(), 1)
+
+
+class SessionSeriesTests(BookingTestCase):
+    commitment_level = 'intensive'
+
+    def test_occurrences_or_until(self):
+        self.assertEqual(
+            series_starts(self.start, 'weekly', occurrences=3),
+            [self.start, self.start + timedelta(days=7), self.start + timedelta(days=14)]
+        )
+        until = timezone.localdate(self.start) + timedelta(days=28)
+        self.assertEqual(
+            series_starts(self.start, 'biweekly', until=until),
+            [self.start, self.start + timedelta(days=14), self.start + timedelta(days=28)]
+        )
+
+    def test_series_is_capped(self):
+        far = timezone.localdate(self.start) + timedelta(days=365)
+        self.assertEqual(len(series_starts(self.start, 'weekly', until=far)), MAX_OCCURRENCES)
+
+        local = timezone.localtime(self.start)
+        form = BookingForm(self.tutor, {
+            'subject': self.subject.id,
+            'duration_hours': '1.0',
+            'preferred_date': local.date().isoformat(),
+            'preferred_time': local.strftime('%H:%M'),
+            'repeat': 'weekly',
+            'repeat_until': far.isoformat(),
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn(f'A series can have at most {MAX_OCCURRENCES} sessions.', form.non_field_errors())
+
+    def test_keeps_wall_clock_time_across_dst(self):
+        new_york = ZoneInfo('America/New_York')
+        # US daylight saving time ends on Sunday, November 1 2026
+        first = datetime(2026, 10, 26, 17, 0, tzinfo=new_york)
+        with timezone.override(new_york):
+            starts = series_starts(first, 'weekly', occurrences=3)
+        self.assertEqual([start.astimezone(new_york).hour for start in starts], [17, 17, 17])
+        # ... which is one more real hour after the change
+        utc = [start.astimezone(dt_timezone.utc) for start in starts]
+        self.assertEqual(utc[1] - utc[0], timedelta(days=7, hours=1))
+
+    def test_one_clash_rejects_whole_series(self):
+        other_student = User.objects.create_user('otherstudent', password='x', user_type='student')
+        book_session(other_student, self.tutor, self.subject, self.start + timedelta(days=14), '1.0')
+
+        with self.assertRaises(BookingConflict):
+            book_series(self.student, self.tutor, self.subject, series_starts(self.start, 'weekly', occurrences=4), '1.0', 'weekly')
+
+        self.assertFalse(SessionSeries.objects.exists())
+        self.assertEqual(TutoringSession.objects.count(), 1)
+
+    def test_cancel_series_leaves_past_sessions(self):
+        series = book_series(self.student, self.tutor, self.subject, series_starts(self.start, 'weekly', occurrences=3), '1.0', 'weekly')
+        first, *later = series.sessions.order_by('date_time')
+        TutoringSession.objects.filter(pk=first.pk).update(date_time=timezone.now() - timedelta(days=1))
+
+        self.client.force_login(self.student)
+        self.client.get(reverse('session_action', args=[later[0].id, 'cancel_series']))
+
+        statuses = dict(series.sessions.values_list('id', 'status'))
+        self.assertEqual(statuses, {first.id: 'pending', later[0].id: 'cancelled', later[1].id: 'cancelled'})
+
+    def test_accept_series(self):
+        series = book_series(self.student, self.tutor, self.subject, series_starts(self.start, 'weekly', occurrences=3), '1.0', 'weekly')
+
+        self.client.force_login(self.tutor.user)
+        self.client.get(reverse('session_action', args=[series.sessions.first().id, 'accept_series']))
+
+        self.assertEqual(set(series.sessions.values_list('status', flat=True)), {'confirmed'})
+
+    def test_accept_series_leaves_past_sessions(self):
+        series = book_series(self.student, self.tutor, self.subject, series_starts(self.start, 'weekly', occurrences=2), '1.0', 'weekly')
+        first, later = series.sessions.order_by('date_time')
+        TutoringSession.objects.filter(pk=first.pk).update(date_time=timezone.now() - timedelta(days=1))
+
+        self.client.force_login(self.tutor.user)
+        self.client.get(reverse('session_action', args=[later.id, 'accept_series']))
+
+        statuses = dict(series.sessions.values_list('id', 'status'))
+        self.assertEqual(statuses, {first.id: 'pending', later.id: 'confirmed'})
+
+    def test_series_action_on_single_session(self):
+        session = book_session(self.student, self.tutor, self.subject, self.start, '1.0')
+
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('session_action', args=[session.id, 'cancel_series']), follow=True)
+
+        self.assertContains(response, 'This session is not part of a series.')
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'pending')
+
+
+class SessionTransitionTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = book_session(self.student, self.tutor, self.subject, self.start, '1.0')
+
+    def test_illegal_transition_is_refused(self):
+        self.assertFalse(apply_transition(self.session, 'complete', self.tutor.user))
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'pending')
+        self.assertFalse(SessionEvent.objects.exists())
+
+    def test_second_of_two_racing_actions_loses(self):
+        accepting = TutoringSession.objects.get(pk=self.session.pk)
+        cancelling = TutoringSession.objects.get(pk=self.session.pk)
+
+        self.assertTrue(apply_transition(cancelling, 'cancel', self.student))
+        # Still 'pending' in memory, but no longer in the database
+        self.assertFalse(apply_transition(accepting, 'accept', self.tutor.user))
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'cancelled')
+        self.assertEqual(SessionEvent.objects.count(), 1)
+
+    def test_event_records_from_status(self):
+        apply_transition(self.session, 'accept', self.tutor.user)
+        apply_transition(self.session, 'cancel', self.student)
+
+        events = list(self.session.events.values_list('action', 'from_status', 'to_status', 'actor'))
+        self.assertEqual(events, [
+            ('accept', 'pending', 'confirmed', self.tutor.user.pk),
+            ('cancel', 'confirmed', 'cancelled', self.student.pk),
+        ])
+
+    def test_set_based_transition_records_each_session(self):
+        other = book_session(self.student, self.tutor, self.subject, self.start + timedelta(days=1), '1.0')
+        apply_transition(other, 'accept', self.tutor.user)
+
+        moved = apply_transition_to_all(TutoringSession.objects.all(), 'cancel', self.student)
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(
+            set(SessionEvent.objects.filter(action='cancel').values_list('session_id', 'from_status')),
+            {(self.session.pk, 'pending'), (other.pk, 'confirmed')}
+        )
+
+    def test_pages_offer_only_allowed_actions(self):
+        accept_url = reverse('session_action', args=[self.session.id, 'accept'])
+        cancel_url = reverse('session_action', args=[self.session.id, 'cancel'])
+        self.client.force_login(self.tutor.user)
+        for page in (reverse('session_detail', args=[self.session.id]), reverse('dashboard')):
+            with self.subTest(page=page):
+                response = self.client.get(page)
+                self.assertContains(response, accept_url)
+                self.assertNotContains(response, cancel_url)
+
+        apply_transition(self.session, 'cancel', self.student)
+
+        response = self.client.get(reverse('session_detail', args=[self.session.id]))
+        self.assertNotContains(response, accept_url)
+        self.assertNotContains(response, cancel_url)
+
+    def test_completing_a_session_that_moved_fails(self):
+        TutoringSession.objects.filter(pk=self.session.pk).update(
+            status='confirmed',
+            date_time=timezone.now() - timedelta(hours=2),
+            end_time=timezone.now() - timedelta(hours=1)
+        )
+        stale = TutoringSession.objects.get(pk=self.session.pk)
+        apply_transition(TutoringSession.objects.get(pk=self.session.pk), 'cancel', self.student)
+
+        with self.assertRaises(ValueError):
+            stale.mark_as_completed(self.tutor.user)
+
+        self.assertFalse(VolunteerHoursEntry.objects.exists())
+        self.assertFalse(SessionEvent.objects.filter(action='complete').exists())
+
+
+class WeeklyCapacityTests(BookingTestCase):
+    # Casual tutors take up to 2 hours a week
+    commitment_level = 'casual'
+
+    def load(self, start=None):
+        week = week_of(start or self.start)
+        return TutorWeeklyLoad.objects.filter(tutor=self.tutor, week=week).values_list('hours', flat=True).first()
+
+    def test_booking_over_capacity_rejected(self):
+        book_session(self.student, self.tutor, self.subject, self.start, '1.5')
+        with self.assertRaisesMessage(BookingConflict, 'no more hours free'):
+            book_session(self.student, self.tutor, self.subject, self.start + timedelta(days=1), '1.0')
+        # The next week is still open
+        book_session(self.student, self.tutor, self.subject, self.start + timedelta(days=7), '1.0')
+        self.assertEqual(self.load(), Decimal('1.5'))
+
+    def test_freeing_transitions_release_hours(self):
+        for action in ('cancel', 'reject'):
+            with self.subTest(action=action):
+                session = book_session(self.student, self.tutor, self.subject, self.start, '2.0')
+                self.assertEqual(self.load(), Decimal('2.0'))
+                apply_transition(session, action, self.tutor.user)
+                self.assertEqual(self.load(), Decimal('0.0'))
+
+        book_session(self.student, self.tutor, self.subject, self.start, '2.0')
+        expire_pending_sessions(self.start + timedelta(minutes=1))
+        self.assertEqual(self.load(), Decimal('0.0'))
+
+    def test_accepting_and_completing_keep_hours(self):
+        session = book_session(self.student, self.tutor, self.subject, self.start, '2.0')
+        apply_transition(session, 'accept', self.tutor.user)
+        apply_transition(session, 'complete', self.tutor.user)
+        self.assertEqual(self.load(), Decimal('2.0'))
+
+    def test_search_hides_tutor_full_in_every_bookable_week(self):
+        now = timezone.now()
+        weeks = weeks_between(now, now + timedelta(days=BOOKING_DAYS))
+        TutorWeeklyLoad.objects.bulk_create([
+            TutorWeeklyLoad(tutor=self.tutor, week=week, hours=Decimal('2')) for week in weeks[:-1]
+        ])
+
+        def listed():
+            response = self.client.get(reverse('tutor_search'))
+            return self.tutor in list(response.context['tutors'])
+
+        self.assertTrue(listed())
+        TutorWeeklyLoad.objects.create(tutor=self.tutor, week=weeks[-1], hours=Decimal('1.5'))
+        self.assertFalse(listed())
+
+    def test_rebuild_matches_incremental_totals(self):
+        other = make_tutor('othertutor', commitment_level='dedicated')
+        kept = book_session(self.student, self.tutor, self.subject, self.start, '1.0')
+        apply_transition(kept, 'accept', self.tutor.user)
+        cancelled = book_session(self.student, self.tutor, self.subject, self.start + timedelta(days=1), '1.0')
+        apply_transition(cancelled, 'cancel', self.student)
+        book_series(self.student, other, self.subject, series_starts(self.start + timedelta(days=2), 'weekly', occurrences=3), '2.5', 'weekly')
+
+        def totals():
+            return set(TutorWeeklyLoad.objects.exclude(hours=0).values_list('tutor_id', 'week', 'hours'))
+
+        incremental = totals()
+        TutorWeeklyLoad.objects.update(hours=Decimal('9'))
+        call_command('rebuild_weekly_loads', stdout=StringIO())
 
-# Create your tests here.
+        self.assertEqual(totals(), incremental)
@@ -0,0 +1,103 @@
+"""
+Session status changes.
+
+TRANSITIONS is the state graph: each action names the statuses it may
+leave and the one it enters. A change is a single conditional UPDATE that
+only matches rows still in one of those statuses, so when two requests
+race, only the first applies and the other is told so instead of
+overwriting it. Every applied change appends a SessionEvent, and changes
+that free the time give the hours back to the tutor's weekly capacity.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .capacity import COUNTED_STATUSES, release_load
+from .models import SessionEvent, TutoringSession
+from .summary import invalidate_dashboard_summary
+
+TRANSITIONS = {
+    'accept': (('pending',), 'confirmed'),
+    'reject': (('pending',), 'cancelled'),
+    'cancel': (('pending', 'confirmed'), 'cancelled'),
+    'complete': (('confirmed',), 'completed'),
+    'expire': (('pending',), 'expired'),
+}
+
+
+def can_transition(session, action):
+    return session.status in TRANSITIONS[action][0]
+
+
+def apply_transition(session, action, actor=None, **changes):
+    """
+    Move ``session`` along ``action`` and return whether it applied.
+
+    ``changes`` are further fields to set in the same UPDATE. The event's
+    from_status is the status ``session`` was loaded with.
+    """
+    sources, target = TRANSITIONS[action]
+    if session.status not in sources:
+        return False
+    now = timezone.now()
+    with transaction.atomic():
+        applied = TutoringSession.objects.filter(pk=session.pk, status__in=sources).update(
+            status=target, updated_at=now, **changes
+        )
+        if not applied:
+            return False
+        SessionEvent.objects.create(
+            session_id=session.pk,
+            actor=actor,
+            action=action,
+            from_status=session.status,
+            to_status=target,
+            created_at=now
+        )
+        if target not in COUNTED_STATUSES:
+            release_load([(session.tutor_id, session.date_time, session.duration_hours)])
+        # update() skips the save signals that keep dashboard summaries fresh
+        transaction.on_commit(lambda: invalidate_dashboard_summary(session.student_id, session.tutor_id))
+    session.status = target
+    session.updated_at = now
+    for field, value in changes.items():
+        setattr(session, field, value)
+    return True
+
+
+def apply_transition_to_all(sessions, action, actor=None, now=None):
+    """
+    Move every session in the queryset ``sessions`` that allows ``action``,
+    and return how many moved.
+
+    The matching rows are locked and read first so each gets an event with
+    its own from_status; the change itself is still one UPDATE.
+    """
+    sources, target = TRANSITIONS[action]
+    now = now or timezone.now()
+    with transaction.atomic():
+        rows = list(
+            sessions.filter(status__in=sources).select_for_update()
+            .values_list('id', 'status', 'student_id', 'tutor_id', 'date_time', 'duration_hours')
+        )
+        if not rows:
+            return 0
+        TutoringSession.objects.filter(
+            id__in=[row[0] for row in rows],
+            status__in=sources
+        ).update(status=target, updated_at=now)
+        SessionEvent.objects.bulk_create([
+            SessionEvent(
+                session_id=session_id,
+                actor=actor,
+                action=action,
+                from_status=status,
+                to_status=target,
+                created_at=now
+            )
+            for session_id, status, *_ in rows
+        ])
+        if target not in COUNTED_STATUSES:
+            release_load([(tutor_id, date_time, hours) for _, _, _, tutor_id, date_time, hours in rows])
+        people = {user_id for _, _, student_id, tutor_id, *_ in rows for user_id in (student_id, tutor_id)}
+        transaction.on_commit(lambda: invalidate_dashboard_summary(*people))
+    return len(rows)
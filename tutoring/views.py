@@ -1,17 +1,29 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Avg  # Added Avg
+from django.db.models import Max, Q
 from django.http import JsonResponse
-from datetime import datetime
+from datetime import datetime, timedelta
 from .models import Subject, TutoringSession, Review
 from accounts.models import User, TutorProfile
+from .availability import BOOKING_DAYS, available_between, merge_slots, weekly_available
+from .booking import BookingConflict, book_series, book_session as create_booking
+from .capacity import exclude_full, weeks_between
 from .forms import TutorSearchForm, BookingForm, ReviewForm  # Added ReviewForm
+from .forms import AvailabilityExceptionFormSet, AvailabilitySlotFormSet
+from .search import search_tutors
+from .summary import get_dashboard_summary
+from .transitions import apply_transition, apply_transition_to_all, can_transition
+from .page_cache import home_page_versions, tutor_page_versions
+from tutoring_platform.caching import cache_anonymous_page
+from tutoring_platform.conditional import conditional_page
+from tutoring_platform.pagination import fragment_response, is_fragment_request, paginate
 from django.utils import timezone
 
+@cache_anonymous_page(home_page_versions)
 def home(request):
     subjects = Subject.objects.all()[:6]  # Show first 6 subjects
-    featured_tutors = TutorProfile.objects.filter(is_verified=True)[:6]
+    featured_tutors = TutorProfile.objects.filter(is_verified=True).select_related('user').order_by('-rank_score', '-id')[:6]
     return render(request, 'tutoring/home.html', {
         'subjects': subjects,
         'featured_tutors': featured_tutors
@@ -19,24 +31,70 @@ def home(request):
 
 def tutor_search(request):
     form = TutorSearchForm(request.GET or None)
-    tutors = TutorProfile.objects.filter(is_verified=True)
+    tutors = TutorProfile.objects.filter(is_verified=True).select_related('user').prefetch_related('subjects')
+    # Tutors with no hours left in any week that can still be booked
+    now = timezone.now()
+    tutors = exclude_full(tutors, weeks_between(now, now + timedelta(days=BOOKING_DAYS)))
     
     if form.is_valid():
+        query = form.cleaned_data.get('q')
         subject = form.cleaned_data.get('subject')
         location = form.cleaned_data.get('location')
         max_rate = form.cleaned_data.get('max_rate')
+        weekday = form.cleaned_data.get('weekday')
+        available_date = form.cleaned_data.get('available_date')
         
         if subject:
             tutors = tutors.filter(subjects=subject)
+        if available_date:
+            tutors = available_between(
+                tutors,
+                timezone.make_aware(datetime.combine(available_date, form.cleaned_data['available_from'])),
+                timezone.make_aware(datetime.combine(available_date, form.cleaned_data['available_until']))
+            )
+        elif weekday is not None:
+            tutors = weekly_available(
+                tutors, weekday,
+                form.cleaned_data['available_from'],
+                form.cleaned_data['available_until']
+            )
         if max_rate:
             tutors = tutors.filter(hourly_rate__lte=max_rate)
-        # Location filtering can be added later
+        if query or location:
+            tutors = search_tutors(tutors, query, location)
+    
+    if 'search_rank' in tutors.query.annotations:
+        ordering = ('-search_rank', 'id')
+    else:
+        ordering = ('-rank_score', '-id')
+    page = paginate(request, tutors, ordering, per_page=20)
+    
+    if is_fragment_request(request):
+        return fragment_response(request, 'tutoring/_tutor_cards.html', {'tutors': page}, page)
     
     return render(request, 'tutoring/tutor_search.html', {
         'form': form,
-        'tutors': tutors
+        'tutors': page,
+        # Counted only for the full page, not for each "load more"
+        'total_tutors': tutors.count()
     })
 
+def tutor_page_state(request, tutor_id):
+    """Reviews, hours and profile edits all move the profile's updated_at"""
+    row = TutorProfile.objects.filter(id=tutor_id).values('updated_at', 'user_id').first()
+    if row is None:
+        return None
+    state = [row['updated_at']]
+    if request.user.is_authenticated and request.user.user_type == 'student':
+        # The review prompt depends on the student's sessions with this tutor
+        state.append(TutoringSession.objects.filter(
+            student=request.user,
+            tutor_id=row['user_id']
+        ).aggregate(latest=Max('updated_at'))['latest'])
+    return state
+
+@conditional_page(tutor_page_state)
+@cache_anonymous_page(tutor_page_versions)
 def tutor_detail(request, tutor_id):
     tutor_profile = get_object_or_404(TutorProfile, id=tutor_id)
     reviews = Review.objects.filter(reviewed=tutor_profile.user).order_by('-created_at')[:5]
@@ -56,6 +114,7 @@ def tutor_detail(request, tutor_id):
     
     return render(request, 'tutoring/tutor_detail.html', {
         'tutor': tutor_profile,
+        'availability_slots': tutor_profile.availability_slots.all(),
         'reviews': reviews,
         'can_review': can_review,
         'unreviewed_session': unreviewed_session,
@@ -73,31 +132,36 @@ def book_session(request, tutor_id):
     if request.method == 'POST':
         form = BookingForm(tutor_profile, request.POST)
         if form.is_valid():
-            # Create timezone-aware datetime
-            naive_datetime = datetime.combine(
-                form.cleaned_data['preferred_date'],
-                form.cleaned_data['preferred_time']
-            )
-            # Make it timezone-aware using Django's timezone
-            aware_datetime = timezone.make_aware(naive_datetime)
-            
-            # Create the tutoring session
-            session = TutoringSession.objects.create(
-                student=request.user,
-                tutor=tutor_profile.user,
-                subject=form.cleaned_data['subject'],
-                date_time=aware_datetime,  # Use timezone-aware datetime
-                duration_hours=form.cleaned_data['duration_hours'],
-                notes=form.cleaned_data['notes'],
-                status='pending'
-            )
-            
-            messages.success(
-                request, 
-                f'Session booking request sent to {tutor_profile.user.get_full_name()}! '
-                f'You can track the status in your dashboard.'
-            )
-            return redirect('dashboard')
+            try:
+                # Checks both calendars under row locks, then creates the session(s)
+                if form.cleaned_data['repeat']:
+                    book_series(
+                        student=request.user,
+                        tutor_profile=tutor_profile,
+                        subject=form.cleaned_data['subject'],
+                        starts=form.cleaned_data['starts'],
+                        duration_hours=form.cleaned_data['duration_hours'],
+                        repeat=form.cleaned_data['repeat'],
+                        notes=form.cleaned_data['notes']
+                    )
+                else:
+                    create_booking(
+                        student=request.user,
+                        tutor_profile=tutor_profile,
+                        subject=form.cleaned_data['subject'],
+                        date_time=form.cleaned_data['date_time'],  # Timezone-aware, from the form
+                        duration_hours=form.cleaned_data['duration_hours'],
+                        notes=form.cleaned_data['notes']
+                    )
+            except BookingConflict as e:
+                form.add_error(None, str(e))
+            else:
+                messages.success(
+                    request, 
+                    f'Session booking request sent to {tutor_profile.user.get_full_name()}! '
+                    f'You can track the status in your dashboard.'
+                )
+                return redirect('dashboard')
     else:
         form = BookingForm(tutor_profile)
     
@@ -106,20 +170,58 @@ def book_session(request, tutor_id):
         'form': form
     })
 
+@login_required
+def manage_availability(request):
+    if request.user.user_type != 'tutor':
+        messages.error(request, 'Only tutors have availability to manage.')
+        return redirect('dashboard')
+    tutor_profile = get_object_or_404(TutorProfile, user=request.user)
+    # Past exceptions no longer matter, so they are not listed
+    upcoming_exceptions = tutor_profile.availability_exceptions.filter(date__gte=timezone.localdate())
+    
+    if request.method == 'POST':
+        slot_formset = AvailabilitySlotFormSet(request.POST, instance=tutor_profile, prefix='slots')
+        exception_formset = AvailabilityExceptionFormSet(
+            request.POST, instance=tutor_profile, prefix='exceptions', queryset=upcoming_exceptions
+        )
+        if slot_formset.is_valid() and exception_formset.is_valid():
+            slot_formset.save()
+            exception_formset.save()
+            merge_slots(tutor_profile)
+            messages.success(request, 'Your availability has been updated.')
+            return redirect('manage_availability')
+    else:
+        slot_formset = AvailabilitySlotFormSet(instance=tutor_profile, prefix='slots')
+        exception_formset = AvailabilityExceptionFormSet(
+            instance=tutor_profile, prefix='exceptions', queryset=upcoming_exceptions
+        )
+    
+    return render(request, 'tutoring/manage_availability.html', {
+        'slot_formset': slot_formset,
+        'exception_formset': exception_formset,
+    })
+
 @login_required
 def dashboard(request):
     if request.user.user_type == 'tutor':
-        sessions = TutoringSession.objects.filter(tutor=request.user).order_by('-date_time')
+        sessions = TutoringSession.objects.filter(tutor=request.user)
         try:
             tutor_profile = request.user.tutorprofile
         except:
             tutor_profile = None
     else:
-        sessions = TutoringSession.objects.filter(student=request.user).order_by('-date_time')
+        sessions = TutoringSession.objects.filter(student=request.user)
         tutor_profile = None
     
+    sessions = sessions.select_related('student', 'tutor', 'subject')
+    page = paginate(request, sessions, ('-date_time', '-id'), per_page=25)
+    
+    if is_fragment_request(request):
+        return fragment_response(request, 'tutoring/_session_rows.html', {'sessions': page}, page)
+    
     return render(request, 'tutoring/dashboard.html', {
-        'sessions': sessions,
+        'sessions': page,
+        'summary': get_dashboard_summary(request.user),
         'tutor_profile': tutor_profile
     })
 
@@ -132,25 +234,29 @@ def session_action(request, session_id, action):
         messages.error(request, "You can only manage your own tutoring sessions.")
         return redirect('dashboard')
     
-    if action == 'cancel' and request.user not in [session.student, session.tutor]:
+    if action == 'accept_series' and request.user != session.tutor:
+        messages.error(request, "You can only manage your own tutoring sessions.")
+        return redirect('dashboard')
+    
+    if action in ['cancel', 'cancel_series'] and request.user not in [session.student, session.tutor]:
         messages.error(request, "You can only cancel sessions you're involved in.")
         return redirect('dashboard')
     
-    # Perform actions
+    # Perform actions; each applies only if the session is still in a state that allows it
     if action == 'accept':
-        session.status = 'confirmed'
-        session.save()
-        messages.success(request, f'Session with {session.student.get_full_name()} has been confirmed!')
+        if apply_transition(session, 'accept', request.user):
+            messages.success(request, f'Session with {session.student.get_full_name()} has been confirmed!')
+        else:
+            messages.error(request, 'This session can no longer be accepted.')
     
     elif action == 'reject':
-        session.status = 'cancelled'
-        session.save()
-        messages.warning(request, f'Session with {session.student.get_full_name()} has been declined.')
+        if apply_transition(session, 'reject', request.user):
+            messages.warning(request, f'Session with {session.student.get_full_name()} has been declined.')
+        else:
+            messages.error(request, 'This session can no longer be declined.')
     
     elif action == 'cancel':
-        if session.status in ['pending', 'confirmed']:
-            session.status = 'cancelled'
-            session.save()
+        if apply_transition(session, 'cancel', request.user):
             if request.user == session.student:
                 messages.success(request, 'Your session has been cancelled.')
             else:
@@ -158,10 +264,23 @@ def session_action(request, session_id, action):
         else:
             messages.error(request, 'This session cannot be cancelled.')
     
+    elif action in ['accept_series', 'cancel_series']:
+        if not session.series_id:
+            messages.error(request, 'This session is not part of a series.')
+        else:
+            # One UPDATE over the whole series; sessions already past or settled are left alone
+            upcoming = TutoringSession.objects.filter(series_id=session.series_id, date_time__gt=timezone.now())
+            if action == 'accept_series':
+                updated = apply_transition_to_all(upcoming, 'accept', request.user)
+                messages.success(request, f'{updated} upcoming sessions with {session.student.get_full_name()} have been confirmed!')
+            else:
+                updated = apply_transition_to_all(upcoming, 'cancel', request.user)
+                messages.success(request, f'{updated} upcoming sessions in this series have been cancelled.')
+    
     elif action == 'complete':
-        if request.user == session.tutor and session.status == 'confirmed':
+        if request.user == session.tutor and can_transition(session, 'complete'):
             try:
-                session.mark_as_completed()
+                session.mark_as_completed(request.user)
                 messages.success(request, f'Session completed! {session.duration_hours} volunteer hours added to your profile.')
             except ValueError as e:
                 messages.error(request, str(e))
@@ -170,7 +289,16 @@ def session_action(request, session_id, action):
     
     return redirect('dashboard')
 
+def session_page_state(request, session_id):
+    row = TutoringSession.objects.filter(id=session_id).values(
+        'updated_at', 'student_id', 'tutor_id', 'student__updated_at', 'tutor__updated_at', 'subject__name'
+    ).first()
+    if row is None or request.user.id not in (row['student_id'], row['tutor_id']):
+        return None
+    return [row['updated_at'], row['student__updated_at'], row['tutor__updated_at'], row['subject__name']]
+
 @login_required
+@conditional_page(session_page_state)
 def session_detail(request, session_id):
     session = get_object_or_404(TutoringSession, id=session_id)
     
@@ -190,7 +318,7 @@ def complete_session(request, session_id):
     
     if request.method == 'POST':
         try:
-            session.mark_as_completed()
+            session.mark_as_completed(request.user)
             messages.success(request, f'Session completed! {session.duration_hours} volunteer hours added to your profile.')
             return redirect('dashboard')
         except ValueError as e:
@@ -205,28 +333,36 @@ def complete_session(request, session_id):
     })
 
 @login_required
-def check_completion_status(request, session_id):
-    """AJAX endpoint to check if session can be completed"""
-    from django.utils import timezone as django_tz
-    
-    session = get_object_or_404(TutoringSession, id=session_id, tutor=request.user)
+def completion_status(request):
+    """
+    Completion state of all the tutor's confirmed sessions, for the dashboard.
     
-    time_left = session.get_time_until_completion()
+    ``next_change_at`` is the next moment any of them becomes completable, so
+    the page only needs to ask again then (null when nothing is pending).
+    """
+    now = timezone.now()
+    statuses = {}
+    next_change_at = None
     
-    # Get session end time and convert to local timezone
-    session_end_time = session.get_session_end_time()
-    if session_end_time:
-        # Convert from UTC to local timezone before formatting
-        local_end_time = django_tz.localtime(session_end_time)
-        formatted_time = local_end_time.strftime('%B %d, %Y at %I:%M %p')
-    else:
-        formatted_time = None
+    confirmed = TutoringSession.objects.filter(
+        tutor=request.user,
+        status='confirmed'
+    ).only('id', 'end_time')
+    for session in confirmed:
+        session_end_time = session.end_time
+        can_complete = session_end_time is not None and now >= session_end_time
+        if not can_complete and session_end_time and (next_change_at is None or session_end_time < next_change_at):
+            next_change_at = session_end_time
+        statuses[session.id] = {
+            'can_complete': can_complete,
+            'time_left_seconds': 0 if can_complete or not session_end_time else int((session_end_time - now).total_seconds()),
+            'session_end_time': timezone.localtime(session_end_time).strftime('%B %d, %Y at %I:%M %p') if session_end_time else None,
+        }
     
     return JsonResponse({
-        'can_complete': session.can_be_completed(),
-        'time_left_seconds': int(time_left.total_seconds()) if time_left else 0,
-        'time_left_display': str(time_left).split('.')[0] if time_left else "Session completed",
-        'session_end_time': formatted_time
+        'now': now.isoformat(),
+        'next_change_at': next_change_at.isoformat() if next_change_at else None,
+        'sessions': statuses,
     })
 
 @login_required
@@ -254,11 +390,9 @@ def submit_review(request, session_id):
             review.session = session
             review.reviewer = request.user  # Student reviewing
             review.reviewed = session.tutor  # Tutor being reviewed
+            # Also updates the tutor's rating counters in the same transaction
             review.save()
             
-            # Update tutor's average rating
-            update_tutor_rating(session.tutor.tutorprofile)
-            
             messages.success(request, 'Thank you for your review!')
             return redirect('dashboard')
     else:
@@ -268,15 +402,3 @@ def submit_review(request, session_id):
         'form': form,
         'session': session
     })
-
-def update_tutor_rating(tutor_profile):
-    """Update tutor's average rating and total reviews"""
-    # Get all reviews for this tutor
-    reviews = Review.objects.filter(reviewed=tutor_profile.user)
-    total = reviews.count()
-    
-    if total > 0:
-        avg_rating = reviews.aggregate(Avg('rating'))['rating__avg']
-        tutor_profile.rating = round(avg_rating, 2)
-        tutor_profile.total_reviews = total
-        tutor_profile.save()
\ No newline at end of file
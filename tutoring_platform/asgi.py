@@ -2,6 +2,8 @@
 ASGI config for tutoring_platform project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it under an ASGI server (e.g. ``uvicorn tutoring_platform.asgi:application``)
+to serve the messaging event stream without tying up a worker per client.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -0,0 +1,90 @@
+"""
+Versioned caching for public pages.
+
+Cached entries are keyed by named versions kept in the cache itself (e.g.
+"tutor:12"). Invalidating means bumping a version: the old entries are
+never read again and expire on their own, and checking a version costs a
+cache read rather than a database query. Versions are timestamps, so a
+version that is evicted and recreated cannot match an old key.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+
+VERSION_TIMEOUT = None  # versions must outlive every entry keyed by them
+
+
+def _version_key(name):
+    return f'cache-version:{name}'
+
+
+def get_versions(names):
+    """Current value of each named version, creating the missing ones"""
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, VERSION_TIMEOUT)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump_versions(*names):
+    """Invalidate everything cached under these versions"""
+    now = time.time_ns()
+    cache.set_many({_version_key(name): now for name in names}, VERSION_TIMEOUT)
+
+
+def _page_key(request, versions):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"page:{path}:{'.'.join(str(version) for version in versions)}"
+
+
+def _cacheable_request(request):
+    # Anonymous GETs only, and never while a flash message is waiting to be shown
+    return (
+        request.method == 'GET'
+        and not request.user.is_authenticated
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def cache_anonymous_page(version_names, timeout=None):
+    """
+    Serve a view from the cache for anonymous visitors.
+
+    ``version_names(**view_kwargs)`` returns the version names the page
+    depends on. Responses that set cookies or use a CSRF token are not cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if not _cacheable_request(request):
+                return view(request, *args, **kwargs)
+            
+            key = _page_key(request, get_versions(version_names(**kwargs)))
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            
+            response = view(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            ):
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    timeout or settings.PAGE_CACHE_TIMEOUT
+                )
+            return response
+        return wrapped
+    return decorator
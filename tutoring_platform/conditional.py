@@ -0,0 +1,61 @@
+"""
+Conditional GET for detail pages.
+
+A view decorated with ``conditional_page(page_state)`` answers
+If-None-Match with 304 before doing its own queries.
+``page_state(request, **view_kwargs)`` reads a few columns (``updated_at``
+timestamps, counters) describing what the page shows, or returns None when
+the page must not be validated (missing object, no permission).
+
+Every page also shows the navbar and a CSRF token, so the viewer is part of
+each validator. A re-login moves ``last_login`` and the CSRF cookie, which
+changes the ETag.
+
+Only an ETag is sent, no Last-Modified: the state includes values that are
+not timestamps (the viewer, the CSRF cookie, names such as the subject's),
+and a change to one of those would not move a date, so If-Modified-Since
+alone could wrongly get a 304.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.messages.storage.session import SessionStorage
+from django.core.exceptions import ObjectDoesNotExist
+from django.views.decorators.http import condition
+
+
+def _has_pending_messages(request):
+    # A 304 would hide a flash message the page is about to show
+    return (
+        CookieStorage.cookie_name in request.COOKIES
+        or SessionStorage.session_key in request.session
+    )
+
+
+def _viewer_state(request):
+    """What the page chrome shows about the viewer"""
+    user = request.user
+    if not user.is_authenticated:
+        return []
+    state = [user.pk, user.updated_at, user.last_login]
+    if user.user_type == 'tutor':
+        # The navbar links tutors by approval status
+        try:
+            state.append(user.tutorprofile.updated_at)
+        except ObjectDoesNotExist:
+            pass
+    return state
+
+
+def _etag(request, state):
+    if state is None or request.method not in ('GET', 'HEAD') or _has_pending_messages(request):
+        return None
+
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return hashlib.md5(repr([*state, *_viewer_state(request), csrf_cookie]).encode()).hexdigest()
+
+
+def conditional_page(page_state):
+    """Compute an ETag from ``page_state``"""
+    return condition(etag_func=lambda request, **kwargs: _etag(request, page_state(request, **kwargs)))
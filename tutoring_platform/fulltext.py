@@ -0,0 +1,36 @@
+"""
+Helpers shared by the full-text search indexes.
+
+SQLite keeps its index in FTS5 virtual tables, Postgres in tsvector columns
+with GIN indexes. Both are queried with the same list of prefix-matched terms
+so user input never reaches either query language unescaped.
+"""
+import re
+
+from django.db import connection
+
+# Letters and digits only: underscores and punctuation are syntax in tsquery
+TERM_RE = re.compile(r'[^\W_]+', re.UNICODE)
+MAX_TERMS = 8
+
+
+def search_terms(text):
+    """Split user input into at most MAX_TERMS lowercase search terms"""
+    return TERM_RE.findall((text or '').lower())[:MAX_TERMS]
+
+
+def fts5_match(terms):
+    """FTS5 MATCH expression requiring every term as a prefix"""
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def pg_tsquery(terms):
+    """to_tsquery() input requiring every term as a prefix"""
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def vendor():
+    """Which index flavour the current database supports"""
+    if connection.vendor in ('sqlite', 'postgresql'):
+        return connection.vendor
+    return None
@@ -0,0 +1,125 @@
+"""
+Serving user uploads in production.
+
+Content-addressed files (see tutoring_platform.storage) are sent with a
+year-long immutable Cache-Control; anything else gets a short lifetime.
+Responses carry an ETag and support single byte ranges. When
+MEDIA_SENDFILE is set, Django only checks the path and hands the file to
+the front server with X-Accel-Redirect (nginx) or X-Sendfile (Apache,
+lighttpd), which then does the sending and range handling itself.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+from .storage import is_content_addressed
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=3600'
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _byte_range(header, size):
+    """(start, end) inclusive for a single satisfiable range, None for no range, False if unsatisfiable"""
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        # Absent, malformed or multi-range: send the whole file
+        return None
+    start, end = match.groups()
+    if start == '':
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        # Invalid rather than unsatisfiable, so ignored (RFC 9110, 14.2)
+        return None
+    if start >= size:
+        return False
+    end = min(int(end), size - 1) if end else size - 1
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    # Paths escaping MEDIA_ROOT raise SuspiciousFileOperation (a 400)
+    full_path = safe_join(settings.MEDIA_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    stat = os.stat(full_path)
+    etag = _etag(stat)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    headers = {
+        'Cache-Control': IMMUTABLE if is_content_addressed(path) else SHORT_LIVED,
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'X-Content-Type-Options': 'nosniff',
+    }
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        response = HttpResponseNotModified()
+        for header in ('Cache-Control', 'ETag', 'Last-Modified'):
+            response[header] = headers[header]
+        return response
+
+    if encoding or not content_type:
+        # Never let the browser unpack an uploaded .gz
+        content_type = 'application/octet-stream'
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = settings.MEDIA_SENDFILE_PREFIX + quote(path)
+        return response
+    if settings.MEDIA_SENDFILE == 'x-sendfile':
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range.strip() == etag:
+        byte_range = _byte_range(request.headers.get('Range'), stat.st_size)
+    if byte_range is False:
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    start, end = byte_range or (0, stat.st_size - 1)
+    response = StreamingHttpResponse(
+        _read_range(full_path, start, end),
+        status=206 if byte_range else 200,
+        content_type=content_type,
+        headers=headers
+    )
+    response['Content-Length'] = str(end - start + 1)
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return response
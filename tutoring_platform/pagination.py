@@ -0,0 +1,131 @@
+"""
+Keyset ("cursor") pagination shared by the list views.
+
+Pages are fetched with ``WHERE (key) < (last key seen)`` instead of OFFSET,
+so the cost of a page stays the same however deep into the history it is.
+The cursor handed to the client is an opaque encoding of the last row's key.
+"""
+import base64
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+
+
+def _cursor_value(value):
+    # Keep full microsecond precision; DjangoJSONEncoder rounds to milliseconds
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'Cannot use {type(value).__name__} in a cursor')
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, default=_cursor_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Return the key values stored in a cursor, or None if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+class CursorPage:
+    """One page of results plus the cursor for the page after it"""
+
+    def __init__(self, items, next_cursor=None, next_url=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.next_url = next_url
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset on a unique ordering such as ('-date_time', '-id').
+
+    The last field must be unique (normally the primary key) so the ordering
+    is total. Fields may be model fields or annotations on the queryset.
+    """
+
+    def __init__(self, queryset, ordering, per_page=20):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def _after(self, values):
+        """Q object selecting rows strictly after the given key"""
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            clause = Q(**{f'{self.fields[index]}__{lookup}': values[index]})
+            for field, value in zip(self.fields[:index], values[:index]):
+                clause &= Q(**{field: value})
+            condition |= clause
+        return condition
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.ordering)
+        values = decode_cursor(cursor, len(self.fields)) if cursor else None
+        if values is not None:
+            try:
+                queryset = queryset.filter(self._after(values))
+            except (ValidationError, ValueError, TypeError):
+                # A tampered cursor whose values don't fit the fields; start again from the first page
+                pass
+
+        items = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[:self.per_page]
+            last = items[-1]
+            next_cursor = encode_cursor([getattr(last, field) for field in self.fields])
+        return CursorPage(items, next_cursor)
+
+
+def paginate(request, queryset, ordering, per_page=20):
+    """Page through ``queryset`` from the request's ``cursor`` parameter"""
+    page = CursorPaginator(queryset, ordering, per_page).page(request.GET.get('cursor'))
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        page.next_url = f'{request.path}?{params.urlencode()}'
+    return page
+
+
+def is_fragment_request(request):
+    """True for the "load more" requests made by the page script"""
+    return request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+
+def fragment_response(request, template_name, context, page):
+    """JSON body for "load more": the rendered items and the next page URL"""
+    return JsonResponse({
+        'html': render_to_string(template_name, context, request=request),
+        'next_url': page.next_url,
+    })
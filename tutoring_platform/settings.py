@@ -72,6 +72,9 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Take the write lock when a transaction starts; SQLite has no
+            # row locks, so this is what serializes bookings (tutoring/booking.py)
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
         }
     }
 
@@ -94,16 +97,84 @@ USE_TZ = True
 # Static files
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads get content-hashed names (see tutoring_platform/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'tutoring_platform.storage.HashedFileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Hand media downloads to the front server: '' (Django streams them),
+# 'x-accel-redirect' (nginx, internal location at MEDIA_SENDFILE_PREFIX) or 'x-sendfile'
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_SENDFILE_PREFIX = os.environ.get('MEDIA_SENDFILE_PREFIX', '/protected-media/')
+
+# Profile picture uploads (see accounts/images.py). 'thread' builds renditions
+# in the background after commit; 'sync' builds them inline (tests, scripts)
+PROFILE_PICTURE_PROCESSING = os.environ.get('PROFILE_PICTURE_PROCESSING', 'thread')
+PROFILE_PICTURE_MAX_BYTES = 5 * 1024 * 1024
+PROFILE_PICTURE_MAX_PIXELS = 25_000_000
+
 # Auth redirects
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Cache backend: 'locmem', 'file' or 'redis'. Page versions and fragment
+# invalidation only reach processes sharing the cache, so locmem (one per
+# process) is the default only with DEBUG; several gunicorn workers need
+# 'file' (one host) or 'redis' (several hosts).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'file')
+# Summaries, tutor card fragments, whole pages and their version keys share
+# one cache; locmem and file cull a third of it when full, so the default of
+# 300 entries would be far too small ('redis' evicts by its own maxmemory)
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '20000'))
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_URL', os.environ.get('REDIS_URL', 'redis://localhost:6379/1')),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        }
+    }
+
+# Lifetime of cached anonymous pages and tutor card fragments (see tutoring_platform/caching.py)
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', '600'))
+
+# Messaging push delivery (see messaging/realtime.py)
+MESSAGING_BROKER = os.environ.get('MESSAGING_BROKER', 'messaging.realtime.InProcessBroker')
+MESSAGING_BROKER_URL = os.environ.get('MESSAGING_BROKER_URL', os.environ.get('REDIS_URL', ''))
+
+# Session reminders (see tutoring/scheduler.py); prints to the console unless configured
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'LoopEd <noreply@looped.local>')
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,48 @@
+"""
+Media storage with content-addressed file names.
+
+Every saved file gets a hash of its bytes in its name
+(``profiles/me.3f2a9c1b7d4e.jpg``). A name therefore always refers to the
+same bytes, which lets tutoring_platform.media serve media as immutable.
+Saving content that is already stored returns the existing name.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 12
+_HASHED_NAME = re.compile(rf'\.[0-9a-f]{{{HASH_LENGTH}}}(\.[^./]+)?$')
+_HASH_SUFFIX = re.compile(rf'\.[0-9a-f]{{{HASH_LENGTH}}}$')
+
+
+def is_content_addressed(name):
+    return bool(_HASHED_NAME.search(name))
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    def hashed_name(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        root, extension = os.path.splitext(name)
+        # Re-saving a stored file (e.g. re-encoded) replaces its hash rather than adding one
+        root = _HASH_SUFFIX.sub('', root)
+        suffix = f'.{digest.hexdigest()[:HASH_LENGTH]}{extension}'
+        if max_length:
+            # Shorten the original name rather than lose the hash
+            root = root[:max(max_length - len(suffix), 0)]
+        return root + suffix
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content, max_length)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
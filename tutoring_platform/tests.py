@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+CONTENT = bytes(range(256)) * 4
+
+
+class ServeMediaTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.media_root = os.path.join(root, 'media')
+        os.makedirs(os.path.join(self.media_root, 'profiles'))
+        with open(os.path.join(self.media_root, 'profiles', 'me.3f2a9c1b7d4e.jpg'), 'wb') as f:
+            f.write(CONTENT)
+        with open(os.path.join(root, 'secret.txt'), 'w') as f:
+            f.write('secret')
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = reverse('media', args=['profiles/me.3f2a9c1b7d4e.jpg'])
+
+    def test_whole_file_with_immutable_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_partial_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-24')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-24:])
+
+    def test_range_past_the_end_is_416(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_invalid_range_sends_whole_file(self):
+        for header in ('bytes=500-100', 'bytes=1-2,5-6', 'items=0-10'):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_stale_if_range_sends_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_path_traversal_is_refused(self):
+        for path in ('/media/../secret.txt', '/media/profiles/../../secret.txt'):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 400)
+                self.assertNotIn(b'secret', response.content)
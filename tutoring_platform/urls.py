@@ -1,7 +1,8 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from .media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,5 +11,8 @@ urlpatterns = [
     path('', include('tutoring.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Uploaded files, in development and production alike, unless MEDIA_URL points elsewhere
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.+)$', serve_media, name='media'),
+    ]